@@ -0,0 +1,52 @@
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Query, status
+
+from app.repositories.contacts.projection import (
+    COLLECTIONS,
+    CONTACT_FIELDS,
+    Fieldset,
+)
+
+# Sparse contact listings: fields=first_name,last_name picks the contact fields
+# (id is always returned) and include=emails,phones the child collections.
+# Without either parameter the full contact is returned; once fields is given,
+# only the collections named in include are loaded.
+
+
+def _parse_names(
+    values: List[str], allowed: Sequence[str], param: str
+) -> Tuple[str, ...]:
+    names = {part.strip() for value in values for part in value.split(",")}
+    names.discard("")
+    unknown = names.difference(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown {param}: {', '.join(sorted(unknown))}. "
+            f"Allowed: {', '.join(allowed)}",
+        )
+    # Kept in the order of the Contact schema whatever the order asked for
+    return tuple(name for name in allowed if name in names)
+
+
+def contact_fieldset(
+    fields: Optional[List[str]] = Query(
+        None, description=f"Comma-separated, any of {', '.join(CONTACT_FIELDS)}"
+    ),
+    include: Optional[List[str]] = Query(
+        None, description=f"Comma-separated, any of {', '.join(COLLECTIONS)}"
+    ),
+) -> Fieldset:
+    fieldset = Fieldset()
+    if fields is not None:
+        names = _parse_names(fields, CONTACT_FIELDS, "fields")
+        fieldset = Fieldset(
+            fields=tuple(f for f in CONTACT_FIELDS if f in names or f == "id"),
+            include=(),
+        )
+    if include is not None:
+        fieldset = fieldset._replace(
+            include=_parse_names(include, COLLECTIONS, "include")
+        )
+    return fieldset
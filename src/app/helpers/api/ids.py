@@ -0,0 +1,23 @@
+from typing import List
+
+from fastapi import HTTPException, status
+
+# ids=1,2,3 and ids=1&ids=2 are both accepted for multi-get requests
+
+
+def parse_ids(values: List[str], max_size: int) -> List[int]:
+    try:
+        ids = [int(part) for value in values for part in value.split(",") if part]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers",
+        )
+    # Duplicates are dropped, the first occurrence keeps its position
+    ids = list(dict.fromkeys(ids))
+    if len(ids) > max_size:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {max_size} ids can be requested at once",
+        )
+    return ids
@@ -0,0 +1,44 @@
+import base64
+import binascii
+import json
+from typing import Callable, List, Optional, Sequence
+
+from fastapi import HTTPException, status
+
+# Opaque cursor tokens for keyset pagination: the sort name plus the sort key
+# values of the last row on the page, as urlsafe base64 JSON.
+
+
+def encode_cursor(sort: str, values: Sequence) -> str:
+    payload = json.dumps({"s": sort, "k": list(values)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, types: Sequence[type]) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        if payload["s"] != sort or not isinstance(values, list):
+            raise ValueError(cursor)
+        if len(values) != len(types) or not all(
+            isinstance(value, type_) for value, type_ in zip(values, types)
+        ):
+            raise ValueError(cursor)
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    return values
+
+
+def paginate(
+    rows: List, limit: int, sort: str, sort_values: Callable[[object, str], list]
+) -> dict:
+    # rows are fetched with limit + 1, the extra row only signals a next page
+    items = rows[:limit]
+    next_cursor: Optional[str] = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(sort, sort_values(items[-1], sort))
+    return {"items": items, "next_cursor": next_cursor}
@@ -2,14 +2,47 @@ from slowapi import Limiter
 from slowapi.errors import RateLimitExceeded
 from slowapi.util import get_remote_address
 from fastapi import Request
+from jose import JWTError, jwt
 from starlette.responses import JSONResponse
 from starlette import status
+from app.settings import settings
+from app.helpers.metrics.metrics import RATE_LIMIT_REJECTIONS, route_label
 
-limiter = Limiter(key_func=get_remote_address)
+
+def rate_limit_key(request: Request) -> str:
+    # Authenticated requests are limited per user whatever address they come
+    # from, anonymous ones per client address. The token signature is checked,
+    # so a client cannot spend another user's budget.
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+            if payload.get("sub"):
+                return f"user:{payload['sub']}"
+        except JWTError:
+            pass
+    return f"ip:{get_remote_address(request)}"
+
+
+# Counters live in RATE_LIMIT_STORAGE_URI: shared by every worker with
+# redis:// or memcached://, per process with memory://. With a shared store,
+# an unreachable server falls back to in-memory counters.
+limiter = Limiter(
+    key_func=rate_limit_key,
+    storage_uri=settings.RATE_LIMIT_STORAGE_URI,
+    strategy=settings.RATE_LIMIT_STRATEGY,
+    key_prefix="contacts-api",
+    in_memory_fallback_enabled=not settings.RATE_LIMIT_STORAGE_URI.startswith(
+        "memory://"
+    ),
+)
 
 
 def rate_limit_exception_handler(request: Request, exc: RateLimitExceeded):
     print(f"Client IP: {request.client.host}")
+    RATE_LIMIT_REJECTIONS.labels(route_label(request.scope)).inc()
     return JSONResponse(
         status_code=status.HTTP_429_TOO_MANY_REQUESTS,
         content={"error": "Resource limit exceeded", "message": str(exc.detail)},
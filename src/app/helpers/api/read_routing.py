@@ -0,0 +1,112 @@
+import threading
+import time
+
+from fastapi import Request
+
+from app.helpers.api.rate_limiter import rate_limit_key
+from app.helpers.metrics.db import DB_READS_ROUTED
+from app.settings import settings
+from db.database import (
+    AsyncReplicaSessionLocal,
+    AsyncSessionLocal,
+    ReplicaSessionLocal,
+    SessionLocal,
+)
+
+# Read-only routes take their session from get_read_db, which picks the read
+# replica unless the caller wrote within READ_YOUR_WRITES_SECONDS: replication
+# lags, so a user's own changes are read back from the primary. Callers are
+# keyed like the rate limiter (the user, else the client address).
+
+UNSAFE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+
+class RecentWrites:
+    """Callers that wrote recently, with the time their window ends.
+
+    It's per process like the user cache: with several workers a read can
+    reach one that did not see the write, so keep the window above the
+    typical replication lag rather than relying on it being exact.
+    """
+
+    def __init__(self, window: float):
+        self.window = window
+        self._until = {}
+        self._lock = threading.Lock()
+
+    def mark(self, key: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._until[key] = now + self.window
+            # Expired entries are dropped as the map grows
+            if len(self._until) > 10_000:
+                self._until = {k: t for k, t in self._until.items() if t > now}
+
+    def is_recent(self, key: str) -> bool:
+        until = self._until.get(key)
+        return until is not None and until > time.monotonic()
+
+
+recent_writes = RecentWrites(settings.READ_YOUR_WRITES_SECONDS)
+
+
+class ReadYourWritesMiddleware:
+    # Marks the caller as a write request is answered: before the response
+    # start is passed on, since a read can follow as soon as the client has
+    # it (background tasks only run after the body is sent)
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in UNSAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+        marked = False
+
+        def mark() -> None:
+            nonlocal marked
+            if not marked:
+                recent_writes.mark(rate_limit_key(Request(scope)))
+                marked = True
+
+        async def send_marking(message) -> None:
+            if message["type"] == "http.response.start":
+                mark()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_marking)
+        finally:
+            # A request that failed before answering may still have written
+            mark()
+
+
+def use_replica(request: Request) -> bool:
+    return not recent_writes.is_recent(rate_limit_key(request))
+
+
+def get_read_db(request: Request):
+    if ReplicaSessionLocal is not None and use_replica(request):
+        DB_READS_ROUTED.labels("replica").inc()
+        session_factory = ReplicaSessionLocal
+    else:
+        DB_READS_ROUTED.labels("primary").inc()
+        session_factory = SessionLocal
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(request: Request):
+    if AsyncReplicaSessionLocal is not None and use_replica(request):
+        DB_READS_ROUTED.labels("async-replica").inc()
+        session_factory = AsyncReplicaSessionLocal
+    else:
+        if AsyncSessionLocal is None:
+            raise RuntimeError("Async database access is disabled, set DB_ASYNC=true")
+        DB_READS_ROUTED.labels("async").inc()
+        session_factory = AsyncSessionLocal
+    async with session_factory() as db:
+        yield db
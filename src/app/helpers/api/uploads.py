@@ -0,0 +1,148 @@
+import hashlib
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, Request, status
+from python_multipart.exceptions import MultipartParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Reads one file field of a multipart request straight from the request
+# stream, keeping it in memory and failing as soon as it exceeds the limit,
+# instead of letting the form parser spool the whole upload to disk first.
+# The content is hashed chunk by chunk as it arrives.
+
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class Upload(NamedTuple):
+    data: bytes
+    content_type: Optional[str]
+    sha256: str
+    filename: Optional[str] = None
+
+
+# OpenAPI request body of routes reading a "file" field with read_upload,
+# which takes the place of an UploadFile parameter
+FILE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                    "required": ["file"],
+                }
+            }
+        },
+    }
+}
+
+
+class _FieldReader:
+    def __init__(self, field: str, max_bytes: int):
+        self.field = field.encode()
+        self.max_bytes = max_bytes
+        self.data: Optional[bytearray] = None
+        self.content_type: Optional[str] = None
+        self.filename: Optional[str] = None
+        self.digest = hashlib.sha256()
+        self._headers: dict = {}
+        self._header_name = b""
+        self._header_value = b""
+        self._in_field = False
+
+    def on_part_begin(self) -> None:
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        self._headers[self._header_name.lower()] = self._header_value
+        self._header_name = self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition"))
+        self._in_field = options.get(b"name") == self.field and self.data is None
+        if self._in_field:
+            self.data = bytearray()
+            content_type = self._headers.get(b"content-type")
+            self.content_type = content_type.decode("latin-1") if content_type else None
+            filename = options.get(b"filename")
+            self.filename = filename.decode("utf-8", "replace") if filename else None
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_field:
+            chunk = data[start:end]
+            self.data += chunk
+            if len(self.data) > self.max_bytes:
+                raise UploadTooLarge()
+            self.digest.update(chunk)
+
+    def on_part_end(self) -> None:
+        self._in_field = False
+
+
+async def read_upload(request: Request, field: str, max_bytes: int) -> Upload:
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Upload is larger than {max_bytes} bytes",
+    )
+    # A declared length over the limit is refused before reading anything
+    content_length = request.headers.get("content-length", "")
+    if (
+        content_length.isdigit()
+        and int(content_length) > max_bytes + MULTIPART_OVERHEAD
+    ):
+        raise too_large
+
+    content_type, params = parse_options_header(request.headers.get("content-type"))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a multipart/form-data upload",
+        )
+    reader = _FieldReader(field, max_bytes)
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": reader.on_part_begin,
+            "on_header_field": reader.on_header_field,
+            "on_header_value": reader.on_header_value,
+            "on_header_end": reader.on_header_end,
+            "on_headers_finished": reader.on_headers_finished,
+            "on_part_data": reader.on_part_data,
+            "on_part_end": reader.on_part_end,
+        },
+    )
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+        parser.finalize()
+    except UploadTooLarge:
+        raise too_large
+    except MultipartParseError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Malformed multipart upload",
+        )
+
+    if not reader.data:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f'No file in the "{field}" field',
+        )
+    return Upload(
+        bytes(reader.data),
+        reader.content_type,
+        reader.digest.hexdigest(),
+        reader.filename,
+    )
@@ -0,0 +1,91 @@
+import csv
+import io
+import json
+from typing import Iterable, Iterator
+
+from app.helpers.contacts_io.importer import (
+    KEY_VALUE_SEPARATOR,
+    MULTI_VALUE_SEPARATOR,
+)
+from db.models.contact import Contact
+
+# Serializers for contact exports. Each one turns an iterable of contacts into
+# text pieces that can be streamed as they are produced.
+
+CSV_COLUMNS = ["first_name", "last_name", "birthday", "emails", "phones"]
+
+
+def iter_ndjson(contacts: Iterable[Contact]) -> Iterator[str]:
+    for contact in contacts:
+        yield json.dumps(_contact_to_dict(contact), ensure_ascii=False) + "\n"
+
+
+def iter_csv(contacts: Iterable[Contact]) -> Iterator[str]:
+    # Same layout the importer reads, so an export can be imported back
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS + ["additional_data"])
+    for contact in contacts:
+        writer.writerow(
+            [
+                contact.first_name,
+                contact.last_name,
+                contact.birthday.isoformat() if contact.birthday else "",
+                MULTI_VALUE_SEPARATOR.join(e.email for e in contact.emails),
+                MULTI_VALUE_SEPARATOR.join(p.phone for p in contact.phones),
+                MULTI_VALUE_SEPARATOR.join(
+                    f"{d.key}{KEY_VALUE_SEPARATOR}{d.value or ''}"
+                    for d in contact.additional_data
+                ),
+            ]
+        )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def iter_vcard(contacts: Iterable[Contact]) -> Iterator[str]:
+    # vCard 3.0 (RFC 2426), additional_data goes into NOTE as "key: value" lines
+    for contact in contacts:
+        lines = [
+            "BEGIN:VCARD",
+            "VERSION:3.0",
+            f"N:{_vcard_escape(contact.last_name)};"
+            f"{_vcard_escape(contact.first_name)};;;",
+            f"FN:{_vcard_escape(f'{contact.first_name} {contact.last_name}')}",
+        ]
+        if contact.birthday:
+            lines.append(f"BDAY:{contact.birthday.isoformat()}")
+        lines += [
+            f"EMAIL;TYPE=INTERNET:{_vcard_escape(e.email)}" for e in contact.emails
+        ]
+        lines += [f"TEL:{_vcard_escape(p.phone)}" for p in contact.phones]
+        if contact.additional_data:
+            note = "\n".join(
+                f"{d.key}: {d.value or ''}" for d in contact.additional_data
+            )
+            lines.append(f"NOTE:{_vcard_escape(note)}")
+        lines.append("END:VCARD")
+        yield "\r\n".join(lines) + "\r\n"
+
+
+def _contact_to_dict(contact: Contact) -> dict:
+    return {
+        "first_name": contact.first_name,
+        "last_name": contact.last_name,
+        "birthday": contact.birthday.isoformat() if contact.birthday else None,
+        "emails": [{"email": e.email} for e in contact.emails],
+        "phones": [{"phone": p.phone} for p in contact.phones],
+        "additional_data": [
+            {"key": d.key, "value": d.value} for d in contact.additional_data
+        ],
+    }
+
+
+def _vcard_escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace(",", "\\,")
+        .replace(";", "\\;")
+    )
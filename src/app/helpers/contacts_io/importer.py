@@ -0,0 +1,86 @@
+import codecs
+import csv
+import json
+from typing import BinaryIO, Iterator, Tuple, Union
+
+# Incremental readers for contact imports. Both yield (row_number, data) where
+# data is a dict shaped like ContactCreate, or a ValueError for rows that could
+# not be parsed at all; rows are read one at a time from the uploaded file.
+
+CONTACT_COLUMNS = {
+    "first_name",
+    "last_name",
+    "birthday",
+    "emails",
+    "phones",
+    "additional_data",
+}
+MULTI_VALUE_SEPARATOR = ";"
+KEY_VALUE_SEPARATOR = "="
+
+ParsedRow = Tuple[int, Union[dict, ValueError]]
+
+
+def iter_csv_rows(file: BinaryIO) -> Iterator[ParsedRow]:
+    """CSV with a header row.
+
+    emails and phones hold ";"-separated values, additional_data holds
+    ";"-separated key=value pairs (the layout the exporter writes), and every
+    other column becomes an additional_data entry keyed by the column name.
+    """
+    lines = codecs.iterdecode(file, "utf-8-sig")
+    reader = csv.DictReader(lines)
+    row_number = 0
+    while True:
+        row_number += 1
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except (csv.Error, UnicodeDecodeError) as err:
+            yield row_number, ValueError(str(err))
+            continue
+        yield row_number, _csv_row_to_contact(row)
+
+
+def iter_ndjson_rows(file: BinaryIO) -> Iterator[ParsedRow]:
+    """One ContactCreate JSON object per line, blank lines are skipped."""
+    for row_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except (ValueError, UnicodeDecodeError) as err:
+            yield row_number, ValueError(f"Invalid JSON: {err}")
+            continue
+        if not isinstance(data, dict):
+            yield row_number, ValueError("Expected a JSON object")
+            continue
+        yield row_number, data
+
+
+def _csv_row_to_contact(row: dict) -> dict:
+    def split(value):
+        return [
+            v.strip() for v in (value or "").split(MULTI_VALUE_SEPARATOR) if v.strip()
+        ]
+
+    return {
+        "first_name": row.get("first_name") or None,
+        "last_name": row.get("last_name") or None,
+        "birthday": row.get("birthday") or None,
+        "emails": [{"email": email} for email in split(row.get("emails"))],
+        "phones": [{"phone": phone} for phone in split(row.get("phones"))],
+        "additional_data": [
+            {"key": key, "value": value or None}
+            for key, _, value in (
+                pair.partition(KEY_VALUE_SEPARATOR)
+                for pair in split(row.get("additional_data"))
+            )
+        ]
+        + [
+            {"key": key, "value": value}
+            for key, value in row.items()
+            if key and key not in CONTACT_COLUMNS and value
+        ],
+    }
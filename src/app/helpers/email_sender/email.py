@@ -1,48 +1,116 @@
+from email.message import EmailMessage
+from email.utils import formataddr
+from functools import lru_cache
 from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
-from pydantic import EmailStr
+from sqlalchemy.orm import Session
 
 from app.settings import settings
-from app.services.auth.jwt_manager import JWTManager
-from fastapi import Depends
-
-
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.MAIL_FROM_NAME,
-    MAIL_STARTTLS=settings.MAIL_STARTTLS,
-    MAIL_SSL_TLS=settings.MAIL_SSL_TLS,
-    USE_CREDENTIALS=settings.USE_CREDENTIALS,
-    VALIDATE_CERTS=settings.VALIDATE_CERTS,
-    TEMPLATE_FOLDER=Path(__file__).parent / "templates",
-)
-
-
-async def send_email(
-    email: EmailStr, username: str, host: str, jwt_manager: JWTManager
-):
-    try:
-        # Use JWTManager to create the email token
-        token_verification = jwt_manager.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email",
-            recipients=[email],
-            template_body={
-                "host": host,
-                "username": username,
-                "token": token_verification,
-            },
-            subtype=MessageType.html,
+from app.services.auth.jwt_manager import jwt_manager
+from app.repositories.email_outbox.outbox import EmailOutboxRepository
+
+if TYPE_CHECKING:
+    import aiosmtplib
+
+# jinja2 and aiosmtplib are imported by the process that sends the mail, on
+# first use; the web app only queues messages and never needs them.
+
+
+@lru_cache
+def email_templates():
+    # Templates are compiled once per process instead of on every message
+    from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+    return Environment(
+        loader=FileSystemLoader(Path(__file__).parent / "templates"),
+        autoescape=select_autoescape(["html"]),
+        auto_reload=False,
+    )
+
+
+VERIFY_EMAIL_TEMPLATE = "verify_email.html"
+TEMPLATES = [VERIFY_EMAIL_TEMPLATE]
+
+
+def render_verify_email(recipient: str, context: dict) -> str:
+    # The token is minted at send time, so it is never stored in the outbox
+    # and its lifetime starts when the message actually goes out
+    token = jwt_manager.create_email_token({"sub": recipient})
+    template = email_templates().get_template(VERIFY_EMAIL_TEMPLATE)
+    return template.render(token=token, **context)
+
+
+def compile_email_templates() -> None:
+    # Loads the templates up front; the environment keeps them compiled and,
+    # without auto_reload, hands them out again without touching the files
+    for name in TEMPLATES:
+        email_templates().get_template(name)
+
+
+# Outbox template keys -> renderers producing the HTML body
+renderers = {"verify_email": render_verify_email}
+
+
+def queue_verification_email(db: Session, email: str, username: str, host: str) -> None:
+    EmailOutboxRepository().enqueue(
+        db,
+        recipient=email,
+        subject="Confirm your email",
+        template="verify_email",
+        context={"host": str(host), "username": username},
+    )
+
+
+def build_message(recipient: str, subject: str, html: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+    message["To"] = recipient
+    message["Subject"] = subject
+    message.set_content(html, subtype="html")
+    return message
+
+
+class SMTPTransport:
+    # One SMTP connection kept open across messages and batches, reopened
+    # when the server drops it
+
+    def __init__(self):
+        self._smtp: Optional["aiosmtplib.SMTP"] = None
+
+    async def _connect(self) -> "aiosmtplib.SMTP":
+        import aiosmtplib
+
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.VALIDATE_CERTS,
         )
+        await smtp.connect()
+        if settings.USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        return smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        import aiosmtplib
+
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Idle connections get closed by servers, retry once on a new one
+            self._smtp = await self._connect()
+            await self._smtp.send_message(message)
+
+    async def close(self) -> None:
+        import aiosmtplib
 
-        # Send the email
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        raise Exception(f"Failed to send email to {email}. Please try again later.")
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
@@ -0,0 +1,111 @@
+import argparse
+import asyncio
+import email
+from email.message import Message
+from typing import List, Optional
+
+# A minimal in-process SMTP server standing in for the real one in tests and
+# local runs. It accepts any credentials and keeps every message in memory.
+# Point the app at it with MAIL_SERVER=localhost MAIL_PORT=<port>
+# MAIL_SSL_TLS=false MAIL_STARTTLS=false.
+
+
+class LocalSMTPServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.host = host
+        self.port = port
+        self.messages: List[Message] = []
+        self.connections = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._received = asyncio.Condition()
+
+    async def start(self) -> "LocalSMTPServer":
+        self._server = await asyncio.start_server(self._session, self.host, self.port)
+        # Port 0 picks a free port, expose the real one
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "LocalSMTPServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.stop()
+
+    async def wait_for(self, count: int, timeout: float = 5) -> List[Message]:
+        # Blocks until at least count messages have been received
+        async with self._received:
+            await asyncio.wait_for(
+                self._received.wait_for(lambda: len(self.messages) >= count), timeout
+            )
+        return self.messages
+
+    async def _session(self, reader, writer) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 localhost ESMTP stand-in")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    await reply("250-localhost")
+                    await reply("250-AUTH PLAIN LOGIN")
+                    await reply("250 8BITMIME")
+                elif verb == "AUTH":
+                    if command.upper().startswith("AUTH LOGIN"):
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while (chunk := await reader.readline()) not in (b".\r\n", b""):
+                        # Undo the dot-stuffing of lines starting with "."
+                        data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    async with self._received:
+                        self.messages.append(email.message_from_bytes(b"".join(data)))
+                        self._received.notify_all()
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                    await reply("250 OK")
+                else:
+                    await reply("502 Command not implemented")
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+async def _serve(host: str, port: int) -> None:
+    server = await LocalSMTPServer(host, port).start()
+    print(f"SMTP stand-in listening on {server.host}:{server.port}")
+    seen = 0
+    while True:
+        await server.wait_for(seen + 1, timeout=None)
+        for message in server.messages[seen:]:
+            print(f"--- {message['To']}: {message['Subject']}")
+            print(message.get_payload(decode=True).decode())
+        seen = len(server.messages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port))
@@ -0,0 +1,140 @@
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+
+from prometheus_client import REGISTRY, Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# SQL and connection pool metrics. The engines are labelled with their
+# pool_logging_name, and the queries run during a request are also added up
+# in that request's QueryStats for the per-request metrics.
+
+DB_QUERIES = Counter("db_queries_total", "SQL statements executed", ["engine"])
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+POOL_CHECKOUTS = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ["engine"]
+)
+POOL_WAIT_SECONDS = Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting for a pooled connection",
+    ["engine"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30),
+)
+POOL_TIMEOUTS = Counter(
+    "db_pool_timeouts_total", "Checkouts that gave up waiting", ["engine"]
+)
+DB_READS_ROUTED = Counter(
+    "db_reads_routed_total", "Read-only requests per engine serving them", ["engine"]
+)
+
+
+class QueryStats:
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "current_query_stats", default=None
+)
+
+
+class _TimedCheckout:
+    # _do_get is where a queue pool hands out a connection, waiting when the
+    # pool and its overflow are exhausted
+    def _do_get(self):
+        name = self.logging_name or "default"
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            POOL_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            POOL_WAIT_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+class PoolCollector:
+    # Pool occupancy is read at scrape time
+    def __init__(self):
+        self.engines: List = []
+
+    def collect(self):
+        families = {
+            "size": GaugeMetricFamily(
+                "db_pool_size", "Configured pool size", labels=["engine"]
+            ),
+            "checkedout": GaugeMetricFamily(
+                "db_pool_checked_out", "Connections in use", labels=["engine"]
+            ),
+            "checkedin": GaugeMetricFamily(
+                "db_pool_checked_in", "Idle pooled connections", labels=["engine"]
+            ),
+            "overflow": GaugeMetricFamily(
+                "db_pool_overflow",
+                "Connections beyond the pool size (negative while below it)",
+                labels=["engine"],
+            ),
+        }
+        for name, engine in self.engines:
+            pool = engine.pool
+            if isinstance(pool, QueuePool):
+                for stat, family in families.items():
+                    family.add_metric([name], getattr(pool, stat)())
+        yield from families.values()
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+def instrument_engine(engine, name: str) -> None:
+    # Async engines are instrumented through their sync counterpart
+    sync_engine = getattr(engine, "sync_engine", engine)
+    pool_collector.engines.append((name, sync_engine))
+    queries = DB_QUERIES.labels(name)
+    query_seconds = DB_QUERY_SECONDS.labels(name)
+    checkouts = POOL_CHECKOUTS.labels(name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        queries.inc()
+        query_seconds.observe(elapsed)
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        started = (
+            context.connection.info.get("query_started") if context.connection else None
+        )
+        if started:
+            started.pop()
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
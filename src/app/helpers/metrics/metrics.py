@@ -0,0 +1,118 @@
+import time
+
+import anyio.to_thread
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram
+from prometheus_client import generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.helpers.cache.user_cache import user_cache
+from app.helpers.metrics.db import QueryStats, current_query_stats
+
+# Request metrics, recorded by MetricsMiddleware and served at /metrics.
+# Routes are labelled with their path template, not the requested URL.
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "Time until the last byte of the response",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests being served")
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent in SQL per request",
+    ["route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+THREADPOOL_BUSY = Gauge(
+    "threadpool_threads_busy", "Threads of the sync route threadpool in use"
+)
+THREADPOOL_SIZE = Gauge("threadpool_threads_total", "Size of the sync route threadpool")
+RATE_LIMIT_REJECTIONS = Counter(
+    "rate_limit_rejections_total", "Requests refused by the rate limiter", ["route"]
+)
+
+
+class UserCacheCollector:
+    # The counters of the authenticated user cache, read at scrape time
+    def __init__(self, cache):
+        self.cache = cache
+
+    def collect(self):
+        stats = self.cache.stats()
+        for name, help_text in [
+            ("hits", "Authenticated user lookups served from the cache"),
+            ("misses", "Authenticated user lookups that went to the database"),
+            ("evictions", "Users dropped from the cache to stay within its size"),
+        ]:
+            yield CounterMetricFamily(f"user_cache_{name}", help_text, stats[name])
+        yield GaugeMetricFamily("user_cache_size", "Cached users", stats["size"])
+        yield GaugeMetricFamily(
+            "user_cache_max_size", "Users the cache holds at most", stats["maxsize"]
+        )
+
+
+REGISTRY.register(UserCacheCollector(user_cache))
+
+
+def route_label(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+class MetricsMiddleware:
+    # Plain ASGI middleware: it sees every request, streaming responses
+    # included, and stops the clock at the last body chunk so background
+    # tasks run after the response are not counted in the latency
+    def __init__(self, app, exclude_paths=()):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+        finished = None
+
+        async def send_wrapper(message):
+            nonlocal status, finished
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                finished = time.perf_counter()
+            await send(message)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            current_query_stats.reset(token)
+            route = route_label(scope)
+            elapsed = (finished or time.perf_counter()) - started
+            REQUEST_SECONDS.labels(scope["method"], route, str(status)).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(route).observe(stats.queries)
+            REQUEST_DB_SECONDS.labels(route).observe(stats.seconds)
+
+
+async def metrics(request: Request) -> Response:
+    # The threadpool limiter belongs to the event loop, read it from here
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_BUSY.set(limiter.borrowed_tokens)
+    THREADPOOL_SIZE.set(limiter.total_tokens)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
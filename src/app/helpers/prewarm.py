@@ -0,0 +1,67 @@
+import asyncio
+import logging
+import time
+from contextlib import AsyncExitStack, ExitStack
+
+from sqlalchemy import text
+
+from app.helpers.email_sender.email import compile_email_templates
+from app.services.auth.jwt_manager import password_hasher
+from app.services.file_services.storage import get_avatar_storage
+from app.services.file_services.upload_service import image_processor
+from app.settings import settings
+from db import database
+
+logger = logging.getLogger(__name__)
+
+# Run from the lifespan before the app takes traffic, so the first requests do
+# not pay for: opening pool connections (and the dialect's first-connect
+# queries), spawning the bcrypt and resize processes, and the integrations
+# that are initialized lazily. A failed step is logged and left to first use.
+
+
+def warm_engine(engine, connections: int) -> None:
+    # Held together, so the pool really opens that many connections
+    with ExitStack() as stack:
+        for _ in range(connections):
+            stack.enter_context(engine.connect()).execute(text("SELECT 1"))
+
+
+async def warm_async_engine(engine, connections: int) -> None:
+    async with AsyncExitStack() as stack:
+        for _ in range(connections):
+            connection = await stack.enter_async_context(engine.connect())
+            await connection.execute(text("SELECT 1"))
+
+
+async def prewarm() -> None:
+    started = time.perf_counter()
+    # Connections beyond the pool size would be closed again on return
+    connections = min(
+        settings.STARTUP_PREWARM_CONNECTIONS or settings.DB_POOL_SIZE,
+        settings.DB_POOL_SIZE,
+    )
+    steps = {}
+    for name, engine in [
+        ("primary", database.engine),
+        ("replica", database.replica_engine),
+    ]:
+        if engine is not None:
+            steps[f"{name} pool"] = asyncio.to_thread(warm_engine, engine, connections)
+    for name, engine in [
+        ("async", database.async_engine),
+        ("async-replica", database.async_replica_engine),
+    ]:
+        if engine is not None:
+            steps[f"{name} pool"] = warm_async_engine(engine, connections)
+    steps["bcrypt processes"] = password_hasher.warm()
+    steps["resize processes"] = image_processor.warm()
+    steps["avatar storage"] = asyncio.to_thread(get_avatar_storage)
+    if settings.MAIL_ENABLED and settings.EMAIL_OUTBOX_WORKER:
+        steps["email templates"] = asyncio.to_thread(compile_email_templates)
+
+    results = await asyncio.gather(*steps.values(), return_exceptions=True)
+    for name, result in zip(steps, results):
+        if isinstance(result, Exception):
+            logger.warning("Prewarming the %s failed: %r", name, result)
+    logger.info("Prewarmed in %.0f ms", (time.perf_counter() - started) * 1000)
@@ -4,7 +4,8 @@ from pathlib import Path
 # Add the 'src' directory to the Python path
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from app.routers.contacts import contacts
+from contextlib import asynccontextmanager
+from app.routers.contacts import contacts, async_contacts
 from fastapi import FastAPI, status, Request
 from app.routers.users import users
 from app.routers.auth import auth
@@ -12,10 +13,34 @@ from app.helpers.api.rate_limiter import limiter, rate_limit_exception_handler
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 from starlette.middleware.cors import CORSMiddleware
+from app.services.auth.jwt_manager import password_hasher
+from app.services.email.outbox_worker import email_outbox_worker
+from app.services.file_services.upload_service import image_processor, upload_executor
+from app.services.file_services.storage import AvatarStaticFiles
+from app.helpers.metrics.metrics import MetricsMiddleware, metrics
+from app.helpers.api.read_routing import ReadYourWritesMiddleware
+from app.helpers.prewarm import prewarm
 from app.settings import settings
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.STARTUP_PREWARM:
+        await prewarm()
+    # Only a process with mail enabled sends the queued emails
+    if settings.EMAIL_OUTBOX_WORKER and settings.MAIL_ENABLED:
+        email_outbox_worker.start()
+    yield
+    await email_outbox_worker.stop()
+    # Stop the bcrypt worker processes
+    password_hasher.shutdown()
+    # Finish pending avatar uploads, then stop the resize processes
+    upload_executor.shutdown(wait=True)
+    image_processor.shutdown()
+
+
 # Init fastapi app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.state.limiter = limiter
 
@@ -35,10 +60,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Keeps the reads of a user who just wrote on the primary database
+if settings.READ_REPLICA_URL:
+    app.add_middleware(ReadYourWritesMiddleware)
+
+# Added last so it wraps everything else, the rate limiter included
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, exclude_paths=[settings.METRICS_PATH])
+    app.add_route(settings.METRICS_PATH, metrics, include_in_schema=False)
+
+# Async routes go first so they take precedence over their sync twins
+if settings.DB_ASYNC:
+    app.include_router(async_contacts.router)
 app.include_router(contacts.router)
 app.include_router(users.router)
 app.include_router(auth.router)
 
+# Avatars kept on local disk are served by the app itself
+if settings.AVATAR_STORAGE == "local":
+    Path(settings.AVATAR_LOCAL_DIR).mkdir(parents=True, exist_ok=True)
+    app.mount(
+        settings.AVATAR_LOCAL_URL,
+        AvatarStaticFiles(directory=settings.AVATAR_LOCAL_DIR),
+        name="avatars",
+    )
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -0,0 +1,163 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.contact import Contact
+from app.routers.contacts.schemas import ContactCreate
+from app.repositories.contacts import queries
+from app.repositories.contacts.diff import apply_contact_changes, build_contact
+from app.repositories.contacts.projection import COLLECTIONS, group_children
+from app.repositories.contacts.stats import StatsDelta, contact_stats_key
+from sqlalchemy import Row
+from typing import Dict, List, Optional, Sequence
+from datetime import date
+
+
+class AsyncContactsRepository:
+    async def create_contact(
+        self, db: AsyncSession, contact: ContactCreate, user_id: int
+    ) -> Contact:
+        db_contact = build_contact(contact, user_id)
+        db.add(db_contact)
+        await db.execute(queries.bump_book_version(user_id))
+        delta = StatsDelta()
+        delta.add(contact_stats_key(db_contact))
+        await self._apply_stats(db, user_id, delta)
+        await db.commit()
+        return db_contact
+
+    async def get_contacts(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        sort: str = "last_name",
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_contacts(user_id, limit, after, sort, columns)
+        return (await db.execute(stmt)).all()
+
+    async def get_children(
+        self,
+        db: AsyncSession,
+        contact_ids: Sequence[int],
+        collections: Sequence[str] = COLLECTIONS,
+    ) -> Dict[str, Dict[int, List[dict]]]:
+        children = {collection: {} for collection in collections}
+        if contact_ids:
+            for collection in collections:
+                stmt = queries.select_children(collection, contact_ids)
+                children[collection] = group_children(
+                    collection, await db.execute(stmt)
+                )
+        return children
+
+    async def get_contact_rows_by_ids(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        ids: Sequence[int],
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_contacts_by_ids(user_id, ids, columns)
+        return (await db.execute(stmt)).all()
+
+    async def get_contact_version(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Optional[int]:
+        return await db.scalar(queries.select_contact_version(contact_id, user_id))
+
+    async def get_book_version(self, db: AsyncSession, user_id: int) -> int:
+        return await db.scalar(queries.select_book_version(user_id)) or 0
+
+    async def get_contact_stats(self, db: AsyncSession, user_id: int) -> List[Row]:
+        return (await db.execute(queries.select_contact_stats([user_id]))).all()
+
+    async def get_contact(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Optional[Contact]:
+        stmt = queries.select_contact(contact_id, user_id)
+        return (await db.scalars(stmt)).first()
+
+    async def update_contact(
+        self, db: AsyncSession, contact_id: int, contact: ContactCreate, user_id: int
+    ) -> Optional[Contact]:
+        stmt = queries.select_contact(contact_id, user_id, for_update=True)
+        db_contact = (await db.scalars(stmt)).first()
+        if db_contact:
+            before = contact_stats_key(db_contact)
+            # One transaction, only the rows that differ are written
+            if apply_contact_changes(db_contact, contact):
+                await db.execute(queries.bump_book_version(user_id))
+                delta = StatsDelta()
+                delta.change(before, contact_stats_key(db_contact))
+                await self._apply_stats(db, user_id, delta)
+                await db.commit()
+                # Objects outlive the commit as they were (expire_on_commit=False),
+                # so the server-side version and new child ids are read back
+                stmt = queries.select_contact(contact_id, user_id)
+                stmt = stmt.execution_options(populate_existing=True)
+                db_contact = (await db.scalars(stmt)).first()
+        return db_contact
+
+    async def delete_contact(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Optional[Contact]:
+        stmt = queries.select_contact(contact_id, user_id, for_update=True)
+        db_contact = (await db.scalars(stmt)).first()
+        if db_contact:
+            delta = StatsDelta()
+            delta.add(contact_stats_key(db_contact), -1)
+            await db.delete(db_contact)
+            await db.execute(queries.bump_book_version(user_id))
+            await self._apply_stats(db, user_id, delta)
+            await db.commit()
+        return db_contact
+
+    @staticmethod
+    async def _apply_stats(db: AsyncSession, user_id: int, delta: StatsDelta) -> None:
+        # After bump_book_version, see repositories/contacts/stats.py
+        rows = delta.rows(user_id)
+        if rows:
+            await db.execute(queries.upsert_contact_stats(rows))
+
+    async def get_contact_by_name_lastname_email(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        name: Optional[str] = None,
+        lastname: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_contacts_by_name_lastname_email(
+            user_id, name, lastname, email, limit, after, columns
+        )
+        return (await db.execute(stmt)).all()
+
+    async def search_contacts(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        q: str,
+        name: Optional[str] = None,
+        lastname: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_contacts_search(
+            user_id, q, name, lastname, email, limit, after, columns
+        )
+        return (await db.execute(stmt)).all()
+
+    async def get_contacts_with_upcoming_birthdays(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        days: int = 7,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_upcoming_birthdays(user_id, date.today(), days, columns)
+        return (await db.execute(stmt)).all()
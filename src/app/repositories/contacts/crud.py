@@ -1,111 +1,358 @@
 from sqlalchemy.orm import sessionmaker, Session
-from sqlalchemy import select, extract
-from db.models.contact import Contact, Email, Phone, AdditionalData
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from db.models.contact import (
+    Contact,
+    Email,
+    Phone,
+    AdditionalData,
+    build_search_text,
+)
+from db.models.contact_stats import ContactStats
 from app.routers.contacts.schemas import ContactCreate, AdditionalDataCreate
-from typing import List, Optional
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from app.repositories.contacts import queries
+from app.repositories.contacts.diff import apply_contact_changes, build_contact
+from app.repositories.contacts.projection import COLLECTIONS, group_children
+from app.repositories.contacts.stats import (
+    COUNTERS,
+    StatsDelta,
+    contact_stats_key,
+    stats_key,
+)
+from sqlalchemy import Row, select, insert
+from sqlalchemy.exc import IntegrityError
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+from datetime import date
+
+# Unique indexes of the child values: the conflicts a batch item reports as 409
+UNIQUE_CHILD_INDEXES = {"ix_emails_email", "ix_phones_phone"}
 
 
 class ContactsRepository:
     def create_contact(
         self, db: Session, contact: ContactCreate, user_id: int
     ) -> Contact:
-        # Convert Pydantic ContactCreate to SQLAlchemy Contact
-        db_contact = Contact(
-            first_name=contact.first_name,
-            last_name=contact.last_name,
-            birthday=contact.birthday,
-            user_id=user_id,  # Associate the contact with the authenticated user
-            emails=[Email(email=email.email) for email in contact.emails],
-            phones=[Phone(phone=phone.phone) for phone in contact.phones],
-            additional_data=[
-                AdditionalData(key=data.key, value=data.value)
-                for data in contact.additional_data
-            ],
-        )
+        db_contact = build_contact(contact, user_id)
         db.add(db_contact)
+        db.execute(queries.bump_book_version(user_id))
+        delta = StatsDelta()
+        delta.add(contact_stats_key(db_contact))
+        _apply_stats(db, user_id, delta)
         db.commit()
         db.refresh(db_contact)
         return db_contact
 
+    def bulk_create_contacts(
+        self, db: Session, rows: List[Tuple[int, ContactCreate]], user_id: int
+    ) -> Tuple[List[Tuple[int, str]], List[Tuple[int, str]]]:
+        """Insert a batch of contacts with multi-row INSERTs, without committing.
+
+        Rows whose emails or phones already exist (or repeat earlier in the
+        batch) are rejected. Returns (rejected, skipped) lists of
+        (row_number, error): rows not inserted at all, and values dropped from
+        inserted rows by ON CONFLICT. The caller owns the transaction.
+        """
+        rejected, skipped = [], []
+        emails = {e.email for _, c in rows for e in c.emails}
+        phones = {p.phone for _, c in rows for p in c.phones}
+        taken_emails = set(
+            db.scalars(select(Email.email).where(Email.email.in_(emails)))
+        )
+        taken_phones = set(
+            db.scalars(select(Phone.phone).where(Phone.phone.in_(phones)))
+        )
+
+        accepted = []
+        for row_number, contact in rows:
+            row_emails = [e.email for e in contact.emails]
+            row_phones = [p.phone for p in contact.phones]
+            conflict = next((e for e in row_emails if e in taken_emails), None) or next(
+                (p for p in row_phones if p in taken_phones), None
+            )
+            if conflict:
+                rejected.append((row_number, f"{conflict} already exists"))
+                continue
+            taken_emails.update(row_emails)
+            taken_phones.update(row_phones)
+            accepted.append((row_number, contact))
+        if not accepted:
+            return rejected, skipped
+
+        contact_ids = db.scalars(
+            insert(Contact).returning(Contact.id, sort_by_parameter_order=True),
+            [
+                {
+                    "first_name": contact.first_name,
+                    "last_name": contact.last_name,
+                    "birthday": contact.birthday,
+                    "user_id": user_id,
+                    "search_text": build_search_text(
+                        contact.first_name,
+                        contact.last_name,
+                        [e.email for e in contact.emails],
+                        [p.phone for p in contact.phones],
+                        [d.value for d in contact.additional_data],
+                    ),
+                }
+                for _, contact in accepted
+            ],
+        ).all()
+
+        # ON CONFLICT covers values committed concurrently since the check above
+        email_rows = [
+            {"email": e.email, "contact_id": contact_id, "row": row_number}
+            for (row_number, contact), contact_id in zip(accepted, contact_ids)
+            for e in contact.emails
+        ]
+        phone_rows = [
+            {"phone": p.phone, "contact_id": contact_id, "row": row_number}
+            for (row_number, contact), contact_id in zip(accepted, contact_ids)
+            for p in contact.phones
+        ]
+        # Contacts left with at least one email / phone, for the stats
+        with_values = {"email": set(), "phone": set()}
+        for model, column, values in (
+            (Email, "email", email_rows),
+            (Phone, "phone", phone_rows),
+        ):
+            if not values:
+                continue
+            inserted = set(
+                db.scalars(
+                    pg_insert(model)
+                    .on_conflict_do_nothing(index_elements=[column])
+                    .returning(getattr(model, column)),
+                    [
+                        {column: v[column], "contact_id": v["contact_id"]}
+                        for v in values
+                    ],
+                )
+            )
+            skipped += [
+                (v["row"], f"{v[column]} already exists, skipped")
+                for v in values
+                if v[column] not in inserted
+            ]
+            with_values[column] = {
+                v["contact_id"] for v in values if v[column] in inserted
+            }
+
+        additional_rows = [
+            {"key": d.key, "value": d.value, "contact_id": contact_id}
+            for (_, contact), contact_id in zip(accepted, contact_ids)
+            for d in contact.additional_data
+        ]
+        if additional_rows:
+            db.execute(insert(AdditionalData), additional_rows)
+        db.execute(queries.bump_book_version(user_id))
+        delta = StatsDelta()
+        for (_, contact), contact_id in zip(accepted, contact_ids):
+            delta.add(
+                stats_key(
+                    contact.birthday,
+                    contact_id in with_values["email"],
+                    contact_id in with_values["phone"],
+                )
+            )
+        _apply_stats(db, user_id, delta)
+        return rejected, skipped
+
     def get_contacts(
-        self, db: Session, user_id: int, skip: int = 0, limit: int = 10
+        self,
+        db: Session,
+        user_id: int,
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        sort: str = "last_name",
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        # Retrieve a page of contacts for the given user, after the keyset cursor
+        stmt = queries.select_contacts(user_id, limit, after, sort, columns)
+        return db.execute(stmt).all()
+
+    def get_children(
+        self,
+        db: Session,
+        contact_ids: Sequence[int],
+        collections: Sequence[str] = COLLECTIONS,
+    ) -> Dict[str, Dict[int, List[dict]]]:
+        # One query per requested collection for a whole page of contact rows
+        if not contact_ids:
+            return {collection: {} for collection in collections}
+        return {
+            collection: group_children(
+                collection, db.execute(queries.select_children(collection, contact_ids))
+            )
+            for collection in collections
+        }
+
+    def iter_contacts(self, db: Session, user_id: int) -> Iterator[Contact]:
+        # The whole book, fetched in batches without materializing it
+        return iter(db.scalars(queries.select_contacts_export(user_id)))
+
+    def get_contacts_by_ids(
+        self, db: Session, user_id: int, ids: Sequence[int], for_update: bool = False
     ) -> List[Contact]:
-        # Retrieve all contacts for the given user
-        return (
-            db.query(Contact)
-            .filter(Contact.user_id == user_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        stmt = queries.select_contacts_by_ids(user_id, ids, for_update=for_update)
+        return db.scalars(stmt).all()
+
+    def get_contact_rows_by_ids(
+        self,
+        db: Session,
+        user_id: int,
+        ids: Sequence[int],
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        stmt = queries.select_contacts_by_ids(user_id, ids, columns)
+        return db.execute(stmt).all()
+
+    def run_batch(self, db: Session, operations: List, user_id: int) -> List[dict]:
+        # All contacts touched by updates/deletes are loaded (and locked) with
+        # one IN query
+        targets = {
+            contact.id: contact
+            for contact in self.get_contacts_by_ids(
+                db,
+                user_id,
+                [op.id for op in operations if op.op != "create"],
+                for_update=True,
+            )
+        }
+        results, modified, delta = [], False, StatsDelta()
+        for index, op in enumerate(operations):
+            result = {"index": index, "op": op.op, "id": getattr(op, "id", None)}
+            results.append(result)
+            db_contact = targets.get(result["id"])
+            if op.op != "create" and db_contact is None:
+                result.update(status=404, error="Contact not found")
+                continue
+            if op.op != "create":
+                before = contact_stats_key(db_contact)
+            # Each operation runs in a savepoint of the one batch transaction,
+            # so a failing item is rolled back without losing the others
+            try:
+                with db.begin_nested():
+                    if op.op == "create":
+                        db_contact = build_contact(op.contact, user_id)
+                        db.add(db_contact)
+                        changed = True
+                    elif op.op == "update":
+                        changed = apply_contact_changes(db_contact, op.contact)
+                    else:
+                        db.delete(db_contact)
+                        changed = True
+            except IntegrityError as err:
+                # Anything but a taken email or phone is a bug, not a conflict
+                if _violated_constraint(err) not in UNIQUE_CHILD_INDEXES:
+                    raise
+                result.update(status=409, error="Email or phone already exists")
+                continue
+            if op.op == "create":
+                delta.add(contact_stats_key(db_contact))
+            elif op.op == "update":
+                delta.change(before, contact_stats_key(db_contact))
+            else:
+                delta.add(before, -1)
+                del targets[db_contact.id]
+            result.update(status=201 if op.op == "create" else 200, id=db_contact.id)
+            modified = modified or changed
+        if modified:
+            db.execute(queries.bump_book_version(user_id))
+            _apply_stats(db, user_id, delta)
+        db.commit()
+
+        # Created and updated contacts are returned as stored, reloaded at once
+        saved = {
+            contact.id: contact
+            for contact in self.get_contacts_by_ids(
+                db,
+                user_id,
+                [r["id"] for r in results if r["status"] < 300 and r["op"] != "delete"],
+            )
+        }
+        for result in results:
+            if result["status"] < 300 and result["op"] != "delete":
+                result["contact"] = saved.get(result["id"])
+        return results
+
+    def get_contact_version(
+        self, db: Session, contact_id: int, user_id: int
+    ) -> Optional[int]:
+        return db.scalar(queries.select_contact_version(contact_id, user_id))
+
+    def get_book_version(self, db: Session, user_id: int) -> int:
+        return db.scalar(queries.select_book_version(user_id)) or 0
+
+    def get_contact_stats(self, db: Session, user_id: int) -> List[Row]:
+        return db.execute(queries.select_contact_stats([user_id])).all()
+
+    def reconcile_contact_stats(
+        self, db: Session, user_ids: Sequence[int]
+    ) -> List[int]:
+        """Recount the contact stats of these users and rewrite the wrong ones.
+
+        The users' rows are locked first, the lock every contact write takes
+        in bump_book_version, so the recount sees each write either whole or
+        not at all (the next statement of a READ COMMITTED transaction sees
+        what committed before it). Returns the users whose stats had drifted.
+        The caller owns the transaction.
+        """
+        db.execute(queries.lock_users(user_ids))
+        fresh = {
+            (row.user_id, row.birth_month): row._asdict()
+            for row in db.execute(queries.count_contact_stats(user_ids))
+        }
+        # Rows counted down to zero are left in place by the writers
+        stored = {
+            (row.user_id, row.birth_month): row._asdict()
+            for row in db.execute(queries.select_contact_stats(user_ids))
+            if any(getattr(row, counter) for counter in COUNTERS)
+        }
+        drifted = {
+            user_id
+            for user_id, month in fresh.keys() | stored.keys()
+            if fresh.get((user_id, month)) != stored.get((user_id, month))
+        }
+        if drifted:
+            db.execute(queries.delete_contact_stats(drifted))
+            rows = [row for key, row in fresh.items() if key[0] in drifted]
+            if rows:
+                db.execute(insert(ContactStats), rows)
+        return sorted(drifted)
 
     def get_contact(
         self, db: Session, contact_id: int, user_id: int
     ) -> Optional[Contact]:
         # Retrieve a specific contact by ID for the given user
-        return (
-            db.query(Contact)
-            .filter(Contact.id == contact_id, Contact.user_id == user_id)
-            .first()
-        )
+        return db.scalars(queries.select_contact(contact_id, user_id)).first()
 
     def update_contact(
         self, db: Session, contact_id: int, contact: ContactCreate, user_id: int
     ) -> Optional[Contact]:
-        db_contact = (
-            db.query(Contact)
-            .filter(Contact.id == contact_id, Contact.user_id == user_id)
-            .first()
-        )
+        stmt = queries.select_contact(contact_id, user_id, for_update=True)
+        db_contact = db.scalars(stmt).first()
         if db_contact:
-
-            for key, value in contact.model_dump(exclude_unset=True).items():
-                if key not in ["emails", "phones", "additional_data"]:
-                    setattr(db_contact, key, value)
-
-            # Replace emails
-            if contact.emails:
-                db_contact.emails.clear()  # Clear existing emails
-                db.commit()  # Commit to ensure old emails are deleted
-                db_contact.emails.extend(
-                    [Email(email=email.email) for email in contact.emails]
-                )
-
-            # Replace phones
-            if contact.phones:
-                db_contact.phones.clear()  # Clear existing phones
-                db.commit()  # Commit to ensure old phones are deleted
-                db_contact.phones.extend(
-                    [Phone(phone=phone.phone) for phone in contact.phones]
-                )
-
-            # Replace additional_data
-            if contact.additional_data:
-                db_contact.additional_data.clear()  # Clear existing additional_data
-                db.commit()  # Commit to ensure old additional_data is deleted
-                db_contact.additional_data.extend(
-                    [
-                        AdditionalData(key=data.key, value=data.value)
-                        for data in contact.additional_data
-                    ]
-                )
-
-            db.commit()
-            db.refresh(db_contact)
+            before = contact_stats_key(db_contact)
+            # One transaction, only the rows that differ are written
+            if apply_contact_changes(db_contact, contact):
+                db.execute(queries.bump_book_version(user_id))
+                delta = StatsDelta()
+                delta.change(before, contact_stats_key(db_contact))
+                _apply_stats(db, user_id, delta)
+                db.commit()
+                db.refresh(db_contact)
         return db_contact
 
     def delete_contact(
         self, db: Session, contact_id: int, user_id: int
     ) -> Optional[Contact]:
-        db_contact = (
-            db.query(Contact)
-            .filter(Contact.id == contact_id, Contact.user_id == user_id)
-            .first()
-        )
+        stmt = queries.select_contact(contact_id, user_id, for_update=True)
+        db_contact = db.scalars(stmt).first()
         if db_contact:
+            delta = StatsDelta()
+            delta.add(contact_stats_key(db_contact), -1)
             db.delete(db_contact)
+            db.execute(queries.bump_book_version(user_id))
+            _apply_stats(db, user_id, delta)
             db.commit()
         return db_contact
 
@@ -116,76 +363,55 @@ class ContactsRepository:
         name: Optional[str] = None,
         lastname: Optional[str] = None,
         email: Optional[str] = None,
-    ) -> List[Contact]:
-        query = db.query(Contact).filter(Contact.user_id == user_id)
-        if name:
-            query = query.filter(func.lower(Contact.first_name) == name.lower())
-        if lastname:
-            query = query.filter(func.lower(Contact.last_name) == lastname.lower())
-        if email:
-            query = query.join(Contact.emails).filter(
-                func.lower(Email.email) == email.lower()
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        return db.execute(
+            queries.select_contacts_by_name_lastname_email(
+                user_id, name, lastname, email, limit, after, columns
             )
-        return query.all()
+        ).all()
 
-    def get_contacts_with_upcoming_birthdays(
-        self, db: Session, user_id: int
-    ) -> List[Contact]:
-        today = datetime.today()
-        next_week = today + timedelta(days=7)
-
-        today_month = today.month
-        today_day = today.day
-        next_week_month = next_week.month
-        next_week_day = next_week.day
-
-        if today_month == next_week_month:
-            # If the range is within the same month
-            res = self._get_birthdays_same_month(
-                db, user_id, today_month, today_day, next_week_day
-            )
-        else:
-            # If the range is e.g. March 30 to April 5
-            res = self._get_birthdays_months_overlap(
-                db, user_id, today_month, today_day, next_week_month, next_week_day
-            )
-        return res
-
-    def _get_birthdays_same_month(
+    def search_contacts(
         self,
         db: Session,
         user_id: int,
-        today_month: int,
-        today_day: int,
-        next_week_day: int,
-    ) -> List[Contact]:
-        return (
-            db.query(Contact)
-            .filter(
-                Contact.user_id == user_id,
-                extract("month", Contact.birthday) == today_month,
-                extract("day", Contact.birthday).between(today_day, next_week_day),
+        q: str,
+        name: Optional[str] = None,
+        lastname: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 10,
+        after: Optional[Sequence] = None,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        # Contact rows ranked for a free-text query, with a rank column
+        return db.execute(
+            queries.select_contacts_search(
+                user_id, q, name, lastname, email, limit, after, columns
             )
-            .all()
-        )
+        ).all()
 
-    def _get_birthdays_months_overlap(
+    def get_contacts_with_upcoming_birthdays(
         self,
         db: Session,
         user_id: int,
-        today_month: int,
-        today_day: int,
-        next_week_month: int,
-        next_week_day: int,
-    ) -> List[Contact]:
-        return (
-            db.query(Contact)
-            .filter(
-                Contact.user_id == user_id,
-                (extract("month", Contact.birthday) == today_month)
-                & (extract("day", Contact.birthday) >= today_day)
-                | (extract("month", Contact.birthday) == next_week_month)
-                & (extract("day", Contact.birthday) <= next_week_day),
-            )
-            .all()
-        )
+        days: int = 7,
+        columns: Sequence = queries.CONTACT_COLUMNS,
+    ) -> List[Row]:
+        return db.execute(
+            queries.select_upcoming_birthdays(user_id, date.today(), days, columns)
+        ).all()
+
+
+def _violated_constraint(err: IntegrityError) -> Optional[str]:
+    # Reported by psycopg2 with the error details
+    diag = getattr(err.orig, "diag", None)
+    return getattr(diag, "constraint_name", None)
+
+
+def _apply_stats(db: Session, user_id: int, delta: StatsDelta) -> None:
+    # After bump_book_version, see repositories/contacts/stats.py
+    rows = delta.rows(user_id)
+    if rows:
+        db.execute(queries.upsert_contact_stats(rows))
@@ -0,0 +1,88 @@
+from collections import Counter
+from typing import Iterable, List, Tuple
+from db.models.contact import Contact, Email, Phone, AdditionalData
+from app.routers.contacts.schemas import ContactCreate
+
+# Fields that feed Contact.search_text
+SEARCHABLE_FIELDS = {"first_name", "last_name", "emails", "phones", "additional_data"}
+
+
+def build_contact(contact: ContactCreate, user_id: int) -> Contact:
+    # Convert Pydantic ContactCreate to SQLAlchemy Contact, for both repositories
+    db_contact = Contact(
+        first_name=contact.first_name,
+        last_name=contact.last_name,
+        birthday=contact.birthday,
+        user_id=user_id,  # Associate the contact with the authenticated user
+        emails=[Email(email=email.email) for email in contact.emails],
+        phones=[Phone(phone=phone.phone) for phone in contact.phones],
+        additional_data=[
+            AdditionalData(key=data.key, value=data.value)
+            for data in contact.additional_data
+        ],
+    )
+    db_contact.refresh_search_text()
+    return db_contact
+
+
+def apply_contact_changes(db_contact: Contact, contact: ContactCreate) -> bool:
+    # Applies the update to the loaded contact in memory only, the caller
+    # flushes it in a single transaction. Returns whether anything changed.
+    changed = set()
+    for key, value in contact.model_dump(exclude_unset=True).items():
+        if key in ["emails", "phones", "additional_data"]:
+            continue
+        if getattr(db_contact, key) != value:
+            setattr(db_contact, key, value)
+            changed.add(key)
+
+    # An empty list leaves the collection untouched, as before
+    if contact.emails and _sync_children(
+        db_contact.emails, Email, ("email",), [(e.email,) for e in contact.emails]
+    ):
+        changed.add("emails")
+    if contact.phones and _sync_children(
+        db_contact.phones, Phone, ("phone",), [(p.phone,) for p in contact.phones]
+    ):
+        changed.add("phones")
+    if contact.additional_data and _sync_children(
+        db_contact.additional_data,
+        AdditionalData,
+        ("key", "value"),
+        [(d.key, d.value) for d in contact.additional_data],
+    ):
+        changed.add("additional_data")
+
+    if changed & SEARCHABLE_FIELDS:
+        db_contact.refresh_search_text()
+    if changed:
+        # Incremented in SQL so concurrent updates never share a version
+        db_contact.version = Contact.version + 1
+    return bool(changed)
+
+
+def _sync_children(
+    collection: List, model: type, fields: Tuple[str, ...], wanted: Iterable[tuple]
+) -> bool:
+    # Rows already holding a wanted value are kept as they are
+    remaining = Counter(wanted)
+    stale = []
+    for row in collection:
+        values = tuple(getattr(row, field) for field in fields)
+        if remaining[values] > 0:
+            remaining[values] -= 1
+        else:
+            stale.append(row)
+    missing = list(remaining.elements())
+
+    # Stale rows are reused for new values (UPDATE), the surplus is deleted
+    # or inserted. A new value never matches a row of this contact, so the
+    # unique email/phone constraints hold whatever order the flush uses.
+    for row, values in zip(stale, missing):
+        for field, value in zip(fields, values):
+            setattr(row, field, value)
+    for row in stale[len(missing) :]:
+        collection.remove(row)
+    for values in missing[len(stale) :]:
+        collection.append(model(**dict(zip(fields, values))))
+    return bool(stale or missing)
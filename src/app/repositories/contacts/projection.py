@@ -0,0 +1,42 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+from app.repositories.contacts.queries import CHILD_COLUMNS
+
+# Contact listings are built straight from row tuples into the dicts the API
+# returns. The rows were just read from our own tables, so they are trusted:
+# nothing goes through pydantic validation (EmailStr parsing included) again.
+
+CONTACT_FIELDS = ("first_name", "last_name", "birthday", "id")
+COLLECTIONS = tuple(CHILD_COLUMNS)
+
+
+class Fieldset(NamedTuple):
+    # Contact fields and child collections a listing returns
+    fields: Tuple[str, ...] = CONTACT_FIELDS
+    include: Tuple[str, ...] = COLLECTIONS
+
+
+FULL = Fieldset()
+
+
+def group_children(collection: str, rows: Iterable) -> Dict[int, List[dict]]:
+    # select_children rows, grouped by contact id
+    keys = [column.key for column in CHILD_COLUMNS[collection]]
+    grouped = defaultdict(list)
+    for contact_id, *values in rows:
+        grouped[contact_id].append(dict(zip(keys, values)))
+    return grouped
+
+
+def contact_dicts(
+    rows: Sequence,
+    children: Dict[str, Dict[int, List[dict]]],
+    fields: Sequence[str] = CONTACT_FIELDS,
+) -> List[dict]:
+    contacts = []
+    for row in rows:
+        contact = {field: getattr(row, field) for field in fields}
+        for collection, grouped in children.items():
+            contact[collection] = grouped.get(row.id, [])
+        contacts.append(contact)
+    return contacts
@@ -0,0 +1,347 @@
+from sqlalchemy import (
+    select,
+    func,
+    tuple_,
+    or_,
+    and_,
+    case,
+    cast,
+    literal,
+    Integer,
+    Select,
+    Update,
+    update,
+    Delete,
+    delete,
+    Insert,
+    SmallInteger,
+    extract,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import selectinload
+from db.models.contact import Contact, Email, Phone, AdditionalData
+from db.models.contact_stats import ContactStats
+from db.models.user import User
+from app.repositories.contacts.stats import COUNTERS
+from typing import List, Optional, Sequence
+from datetime import date, timedelta
+import calendar
+
+# Statement builders shared by the sync and async contacts repositories,
+# so both execution paths always run exactly the same SQL.
+
+# Every statement returning contact entities batch-loads the child
+# collections (one SELECT ... IN per collection), so a page costs a fixed
+# number of round trips instead of 1 + 3N lazy loads.
+CONTACT_CHILDREN = (
+    selectinload(Contact.emails),
+    selectinload(Contact.phones),
+    selectinload(Contact.additional_data),
+)
+
+
+# Contact listings select plain rows of these columns instead of entities, in
+# the order of the schemas.Contact fields, and read the children with
+# select_children; see projection.py
+CONTACT_COLUMNS = (Contact.first_name, Contact.last_name, Contact.birthday, Contact.id)
+CHILD_COLUMNS = {
+    "emails": (Email.email, Email.id, Email.contact_id),
+    "phones": (Phone.phone, Phone.id, Phone.contact_id),
+    "additional_data": (AdditionalData.key, AdditionalData.value, AdditionalData.id),
+}
+
+
+def contact_columns(fields: Sequence[str], *required) -> tuple:
+    # Columns of a sparse listing: the requested fields plus the columns the
+    # caller needs on every row (sort key, id), each selected once
+    columns = {}
+    for column in (*(getattr(Contact, field) for field in fields), *required):
+        columns.setdefault(column.key, column)
+    columns.setdefault("id", Contact.id)
+    return tuple(columns.values())
+
+
+# Keyset orderings for contact pages; each one is a unique key (it ends with id)
+# backed by a (user_id, ...) composite index, see Contact.__table_args__
+CONTACT_SORT_KEYS = {
+    "last_name": (Contact.last_name, Contact.first_name, Contact.id),
+    "first_name": (Contact.first_name, Contact.last_name, Contact.id),
+    "id": (Contact.id,),
+}
+
+
+def contact_sort_values(contact: Contact, sort: str) -> list:
+    return [getattr(contact, column.key) for column in CONTACT_SORT_KEYS[sort]]
+
+
+def contact_sort_types(sort: str) -> list:
+    return [column.type.python_type for column in CONTACT_SORT_KEYS[sort]]
+
+
+# Search results are keyed by (rank, id), see select_contacts_search
+SEARCH_SORT_TYPES = [int, int]
+
+
+def search_sort_values(row, sort: str) -> list:
+    return [row.rank, row.id]
+
+
+def select_children(collection: str, contact_ids: Sequence[int]) -> Select:
+    # (contact_id, *CHILD_COLUMNS[collection]) rows of the given contacts
+    columns = CHILD_COLUMNS[collection]
+    model = columns[0].class_
+    return (
+        select(model.contact_id, *columns)
+        .where(model.contact_id.in_(contact_ids))
+        .order_by(model.id)
+    )
+
+
+def select_contacts(
+    user_id: int,
+    limit: int = 10,
+    after: Optional[Sequence] = None,
+    sort: str = "last_name",
+    columns: Sequence = CONTACT_COLUMNS,
+) -> Select:
+    sort_key = CONTACT_SORT_KEYS[sort]
+    stmt = (
+        select(*columns)
+        .where(Contact.user_id == user_id)
+        .order_by(*sort_key)
+        .limit(limit)
+    )
+    if after is not None:
+        # Seek past the last row of the previous page instead of OFFSET
+        stmt = stmt.where(tuple_(*sort_key) > tuple_(*after))
+    return stmt
+
+
+def select_contacts_export(user_id: int, batch_size: int = 500) -> Select:
+    # Streamed through a server-side cursor, children are selectin-loaded
+    # per batch of yield_per rows
+    return (
+        select(Contact)
+        .options(*CONTACT_CHILDREN)
+        .where(Contact.user_id == user_id)
+        .order_by(Contact.id)
+        .execution_options(yield_per=batch_size)
+    )
+
+
+def select_contacts_by_ids(
+    user_id: int,
+    ids: Sequence[int],
+    columns: Optional[Sequence] = None,
+    for_update: bool = False,
+) -> Select:
+    # Entities by default, rows of the given columns for the multi-get listing
+    if columns is None:
+        stmt = select(Contact).options(*CONTACT_CHILDREN)
+    else:
+        stmt = select(*columns)
+    stmt = stmt.where(Contact.user_id == user_id, Contact.id.in_(ids))
+    if for_update:
+        # Locked in id order, so concurrent batches cannot deadlock
+        stmt = stmt.order_by(Contact.id).with_for_update(of=Contact)
+    return stmt
+
+
+def select_contact_version(contact_id: int, user_id: int) -> Select:
+    return select(Contact.version).where(
+        Contact.id == contact_id, Contact.user_id == user_id
+    )
+
+
+def select_book_version(user_id: int) -> Select:
+    return select(User.contacts_version).where(User.id == user_id)
+
+
+def bump_book_version(user_id: int) -> Update:
+    # Run in the same transaction as every write to the user's contacts
+    return (
+        update(User)
+        .where(User.id == user_id)
+        .values(contacts_version=User.contacts_version + 1)
+    )
+
+
+def upsert_contact_stats(rows: List[dict]) -> Insert:
+    # Adds StatsDelta rows to the user's counters, run right after
+    # bump_book_version in the same transaction
+    stmt = pg_insert(ContactStats).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[ContactStats.user_id, ContactStats.birth_month],
+        set_={
+            counter: getattr(ContactStats, counter) + getattr(stmt.excluded, counter)
+            for counter in COUNTERS
+        },
+    )
+
+
+def select_contact_stats(user_ids: Sequence[int]) -> Select:
+    return select(
+        ContactStats.user_id,
+        ContactStats.birth_month,
+        *(getattr(ContactStats, counter) for counter in COUNTERS),
+    ).where(ContactStats.user_id.in_(user_ids))
+
+
+def count_contact_stats(user_ids: Sequence[int]) -> Select:
+    # The counters recomputed from the contacts, rows shaped as contact_stats
+    has_email = select(Email.id).where(Email.contact_id == Contact.id).exists()
+    has_phone = select(Phone.id).where(Phone.contact_id == Contact.id).exists()
+    month = func.coalesce(cast(extract("month", Contact.birthday), SmallInteger), 0)
+    return (
+        select(
+            Contact.user_id,
+            month.label("birth_month"),
+            func.count().label("contacts"),
+            func.count().filter(~has_email).label("without_email"),
+            func.count().filter(~has_phone).label("without_phone"),
+        )
+        .where(Contact.user_id.in_(user_ids))
+        .group_by(Contact.user_id, month)
+    )
+
+
+def delete_contact_stats(user_ids: Sequence[int]) -> Delete:
+    return delete(ContactStats).where(ContactStats.user_id.in_(user_ids))
+
+
+def lock_users(user_ids: Sequence[int]) -> Select:
+    # The row lock bump_book_version takes, in id order to avoid deadlocks
+    return (
+        select(User.id).where(User.id.in_(user_ids)).order_by(User.id).with_for_update()
+    )
+
+
+def select_user_ids(after: int, limit: int) -> Select:
+    # Keyset pages of all user ids, for the stats reconcile job
+    return select(User.id).where(User.id > after).order_by(User.id).limit(limit)
+
+
+def select_contact(contact_id: int, user_id: int, for_update: bool = False) -> Select:
+    stmt = (
+        select(Contact)
+        .options(*CONTACT_CHILDREN)
+        .where(Contact.id == contact_id, Contact.user_id == user_id)
+    )
+    if for_update:
+        # Writers lock the contact first, then the user row in bump_book_version,
+        # so a stats delta is always computed from the current contact
+        stmt = stmt.with_for_update(of=Contact)
+    return stmt
+
+
+def select_contacts_by_name_lastname_email(
+    user_id: int,
+    name: Optional[str] = None,
+    lastname: Optional[str] = None,
+    email: Optional[str] = None,
+    limit: int = 10,
+    after: Optional[Sequence] = None,
+    columns: Sequence = CONTACT_COLUMNS,
+) -> Select:
+    # Exact case-insensitive matches, paged like the contact list by last name
+    sort_key = CONTACT_SORT_KEYS["last_name"]
+    stmt = (
+        select(*columns)
+        .where(Contact.user_id == user_id)
+        .order_by(*sort_key)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(*sort_key) > tuple_(*after))
+    return _filter_name_lastname_email(stmt, name, lastname, email)
+
+
+def select_contacts_search(
+    user_id: int,
+    q: str,
+    name: Optional[str] = None,
+    lastname: Optional[str] = None,
+    email: Optional[str] = None,
+    limit: int = 10,
+    after: Optional[Sequence] = None,
+    columns: Sequence = CONTACT_COLUMNS,
+) -> Select:
+    """Ranked free-text search over Contact.search_text.
+
+    Matches either the full-text query (GIN on search_vector) or a fuzzy
+    trigram word match (GIN gin_trgm_ops on search_text), so typos still hit.
+    Rows are the columns plus rank, ordered by rank desc then id. The rank is scaled
+    to an integer so the keyset cursor can compare it exactly.
+    """
+    tsquery = func.websearch_to_tsquery("simple", q)
+    relevance = func.greatest(
+        func.ts_rank(Contact.search_vector, tsquery),
+        func.word_similarity(q, Contact.search_text),
+    )
+    rank = cast(func.round(relevance * 1_000_000), Integer).label("rank")
+    stmt = (
+        select(*columns, rank)
+        .where(
+            Contact.user_id == user_id,
+            or_(
+                Contact.search_vector.op("@@")(tsquery),
+                literal(q).op("<%")(Contact.search_text),
+            ),
+        )
+        .order_by(rank.desc(), Contact.id)
+        .limit(limit)
+    )
+    if after is not None:
+        after_rank, after_id = after
+        stmt = stmt.where(
+            or_(rank < after_rank, and_(rank == after_rank, Contact.id > after_id))
+        )
+    return _filter_name_lastname_email(stmt, name, lastname, email)
+
+
+def _filter_name_lastname_email(
+    stmt: Select,
+    name: Optional[str] = None,
+    lastname: Optional[str] = None,
+    email: Optional[str] = None,
+) -> Select:
+    if name:
+        stmt = stmt.where(func.lower(Contact.first_name) == name.lower())
+    if lastname:
+        stmt = stmt.where(func.lower(Contact.last_name) == lastname.lower())
+    if email:
+        stmt = stmt.join(Contact.emails).where(func.lower(Email.email) == email.lower())
+    return stmt
+
+
+def birthday_key(day: date) -> int:
+    # Same encoding as the generated contacts.birthday_key column
+    return day.month * 100 + day.day
+
+
+def select_upcoming_birthdays(
+    user_id: int, today: date, days: int = 7, columns: Sequence = CONTACT_COLUMNS
+) -> Select:
+    end = today + timedelta(days=days)
+    start_key, end_key = birthday_key(today), birthday_key(end)
+    if end_key == 228 and not calendar.isleap(end.year):
+        # Feb 29 birthdays are celebrated on Feb 28 in common years
+        end_key = 229
+
+    if end.year == today.year:
+        in_window = Contact.birthday_key.between(start_key, end_key)
+    else:
+        # The window wraps past Dec 31, e.g. Dec 28 to Jan 4
+        in_window = or_(
+            Contact.birthday_key >= start_key, Contact.birthday_key <= end_key
+        )
+
+    return (
+        select(*columns).where(Contact.user_id == user_id, in_window)
+        # Soonest first: the part of the window before the new year goes first
+        .order_by(
+            case((Contact.birthday_key >= start_key, 0), else_=1),
+            Contact.birthday_key,
+            Contact.id,
+        )
+    )
@@ -0,0 +1,64 @@
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+from db.models.contact import Contact
+
+# Per-user contact counters (db/models/contact_stats.py). Every contact write
+# adds the delta of its changes in the same transaction, after
+# bump_book_version: the user row lock taken there orders the write with the
+# reconcile job, which takes the same lock before counting.
+
+# What a contact counts for: (birthday month or 0, has an email, has a phone)
+StatsKey = Tuple[int, bool, bool]
+
+COUNTERS = ("contacts", "without_email", "without_phone")
+
+
+def stats_key(birthday: Optional[date], has_email: bool, has_phone: bool) -> StatsKey:
+    return (birthday.month if birthday else 0, has_email, has_phone)
+
+
+def contact_stats_key(contact: Contact) -> StatsKey:
+    # The children must be loaded already
+    return stats_key(contact.birthday, bool(contact.emails), bool(contact.phones))
+
+
+class StatsDelta:
+    def __init__(self):
+        self.months: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0])
+
+    def add(self, key: StatsKey, sign: int = 1) -> None:
+        month, has_email, has_phone = key
+        counts = self.months[month]
+        counts[0] += sign
+        counts[1] += sign * (not has_email)
+        counts[2] += sign * (not has_phone)
+
+    def change(self, before: StatsKey, after: StatsKey) -> None:
+        if before != after:
+            self.add(before, -1)
+            self.add(after)
+
+    def rows(self, user_id: int) -> List[dict]:
+        # Sorted by month so concurrent upserts lock the rows in the same order
+        return [
+            dict(zip(COUNTERS, counts), user_id=user_id, birth_month=month)
+            for month, counts in sorted(self.months.items())
+            if any(counts)
+        ]
+
+
+def summarize_stats(rows: Iterable, month: int) -> dict:
+    # contact_stats rows of a user -> the /api/contacts/stats response
+    by_month = [0] * 13
+    totals = dict.fromkeys(COUNTERS, 0)
+    for row in rows:
+        by_month[row.birth_month] = row.contacts
+        for counter in COUNTERS:
+            totals[counter] += getattr(row, counter)
+    return {
+        **totals,
+        "without_birthday": by_month[0],
+        "birthdays_this_month": by_month[month],
+        "birthdays_by_month": by_month[1:],
+    }
@@ -0,0 +1,63 @@
+from datetime import timedelta
+from typing import List, Optional, Sequence
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+from db.models.email_outbox import EmailOutbox, utcnow
+
+
+class EmailOutboxRepository:
+    def enqueue(
+        self, db: Session, recipient: str, subject: str, template: str, context: dict
+    ) -> EmailOutbox:
+        message = EmailOutbox(
+            recipient=recipient, subject=subject, template=template, context=context
+        )
+        db.add(message)
+        db.commit()
+        return message
+
+    def claim_batch(
+        self, db: Session, limit: int, lease_seconds: float
+    ) -> List[EmailOutbox]:
+        # Due messages are locked with SKIP LOCKED so several workers can drain
+        # the outbox at once, and leased: a worker that dies mid-batch leaves
+        # them "sending" until the lease runs out and they are claimed again
+        now = utcnow()
+        messages = db.scalars(
+            select(EmailOutbox)
+            .where(
+                EmailOutbox.status.in_(["pending", "sending"]),
+                EmailOutbox.next_attempt_at <= now,
+            )
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        ).all()
+        for message in messages:
+            message.status = "sending"
+            message.attempts += 1
+            message.next_attempt_at = now + timedelta(seconds=lease_seconds)
+        db.commit()
+        return messages
+
+    def mark_sent(self, db: Session, ids: Sequence[int]) -> None:
+        if ids:
+            db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(ids))
+                .values(status="sent", sent_at=utcnow(), last_error=None)
+            )
+            db.commit()
+
+    def mark_failed(
+        self, db: Session, id: int, error: str, retry_in: Optional[float]
+    ) -> None:
+        # retry_in=None gives up on the message
+        values = {"last_error": error[:1000]}
+        if retry_in is None:
+            values["status"] = "failed"
+        else:
+            values["status"] = "pending"
+            values["next_attempt_at"] = utcnow() + timedelta(seconds=retry_in)
+        db.execute(update(EmailOutbox).where(EmailOutbox.id == id).values(**values))
+        db.commit()
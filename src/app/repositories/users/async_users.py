@@ -0,0 +1,43 @@
+from typing import Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from db.models.user import User
+from app.repositories.users import queries
+from app.helpers.cache.user_cache import user_cache
+
+
+class AsyncUsersRepository:
+    async def get_user_by_username(self, db: AsyncSession, username: str) -> User:
+        return (await db.scalars(queries.select_user_by_username(username))).first()
+
+    async def get_user_by_email(self, db: AsyncSession, email: str) -> User:
+        return (await db.scalars(queries.select_user_by_email(email))).first()
+
+    async def get_user_by_id(self, db: AsyncSession, id: int) -> User:
+        return (await db.scalars(queries.select_user_by_id(id))).first()
+
+    async def create_user(
+        self, db: AsyncSession, username: str, hashed_password: str, email: str
+    ) -> User:
+        new_user = User(username=username, password=hashed_password, email=email)
+        db.add(new_user)
+        await db.commit()
+        await db.refresh(new_user)
+        return new_user
+
+    async def confirmed_email(self, db: AsyncSession, email: str) -> None:
+        user = await self.get_user_by_email(db, email)
+        user.confirmed = True
+        username = user.username
+        await db.commit()
+        user_cache.invalidate(username)
+
+    async def update_avatar_url(
+        self, db: AsyncSession, email: str, url: str, avatar_hash: Optional[str] = None
+    ) -> User:
+        user = await self.get_user_by_email(db, email)
+        user.avatar = url
+        user.avatar_hash = avatar_hash
+        await db.commit()
+        await db.refresh(user)
+        user_cache.invalidate(user.username)
+        return user
@@ -0,0 +1,16 @@
+from sqlalchemy import select, func, Select
+from db.models.user import User
+
+# Statement builders shared by the sync and async users repositories.
+
+
+def select_user_by_username(username: str) -> Select:
+    return select(User).where(func.lower(User.username) == username.lower())
+
+
+def select_user_by_email(email: str) -> Select:
+    return select(User).where(func.lower(User.email) == email.lower())
+
+
+def select_user_by_id(id: int) -> Select:
+    return select(User).where(User.id == id)
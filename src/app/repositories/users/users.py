@@ -1,19 +1,19 @@
+from typing import Optional
 from sqlalchemy.orm import Session
 from db.models.user import User
-from sqlalchemy import func
+from app.repositories.users import queries
+from app.helpers.cache.user_cache import user_cache
 
 
 class UsersRepository:
     def get_user_by_username(self, db: Session, username: str) -> User:
-        return (
-            db.query(User).filter(func.lower(User.username) == username.lower()).first()
-        )
+        return db.scalars(queries.select_user_by_username(username)).first()
 
     def get_user_by_email(self, db: Session, email: str) -> User:
-        return db.query(User).filter(func.lower(User.email) == email.lower()).first()
+        return db.scalars(queries.select_user_by_email(email)).first()
 
     def get_user_by_id(self, db: Session, id: int) -> User:
-        return db.query(User).filter(User.id == id).first()
+        return db.scalars(queries.select_user_by_id(id)).first()
 
     def create_user(
         self, db: Session, username: str, hashed_password: str, email: str
@@ -27,11 +27,17 @@ class UsersRepository:
     def confirmed_email(self, db: Session, email: str) -> None:
         user = self.get_user_by_email(db, email)
         user.confirmed = True
+        username = user.username
         db.commit()
+        user_cache.invalidate(username)
 
-    def update_avatar_url(self, db: Session, email: str, url: str) -> User:
+    def update_avatar_url(
+        self, db: Session, email: str, url: str, avatar_hash: Optional[str] = None
+    ) -> User:
         user = self.get_user_by_email(db, email)
         user.avatar = url
+        user.avatar_hash = avatar_hash
         db.commit()
         db.refresh(user)
+        user_cache.invalidate(user.username)
         return user
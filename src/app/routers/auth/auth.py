@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, status, Request
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordRequestForm
 from app.routers.auth import schemas
 from db.database import get_db
 from app.services.auth.jwt_manager import Hash
 from app.services.user.user_service import UserService
-from app.helpers.email_sender.email import send_email
+from app.helpers.email_sender.email import queue_verification_email
+from app.services.email.outbox_worker import email_outbox_worker
 from app.routers.auth.schemas import UserResponse
-from app.services.auth.jwt_manager import JWTManager
+from app.services.auth.jwt_manager import jwt_manager
 
 hash_handler = Hash()
 
@@ -21,17 +23,16 @@ router = APIRouter(
 @router.post(
     "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
 )
-def register_user(
+async def register_user(
     body: schemas.UserModel,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(UserService),
 ):
-    jwt_manager = JWTManager()
-
     # Check if the email is already registered
-    email_user = user_service.get_user_by_email(db, body.email)
+    # The handlers are async so awaiting bcrypt holds no threadpool slot,
+    # the blocking DB calls are pushed to the threadpool explicitly
+    email_user = await run_in_threadpool(user_service.get_user_by_email, db, body.email)
     if email_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -39,7 +40,9 @@ def register_user(
         )
 
     # Check if the username is already taken
-    username_user = user_service.get_user_by_username(db, body.username)
+    username_user = await run_in_threadpool(
+        user_service.get_user_by_username, db, body.username
+    )
     if username_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
@@ -47,38 +50,44 @@ def register_user(
         )
 
     # Create a new user
-    new_user = user_service.create_user(
+    hashed_password = await hash_handler.get_password_hash(body.password)
+    new_user = await run_in_threadpool(
+        user_service.create_user,
         db,
         username=body.username,
-        hashed_password=hash_handler.get_password_hash(body.password),
+        hashed_password=hashed_password,
         email=body.email,
     )
 
-    # Send confirmation email
-    background_tasks.add_task(
-        send_email, new_user.email, new_user.username, request.base_url, jwt_manager
+    # Queue the confirmation email, the outbox worker delivers it
+    await run_in_threadpool(
+        queue_verification_email,
+        db,
+        new_user.email,
+        new_user.username,
+        request.base_url,
     )
+    email_outbox_worker.wake()
     return new_user
 
 
 @router.post(
     "/login", response_model=schemas.TokenModel, status_code=status.HTTP_200_OK
 )
-def login(
+async def login(
     body: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
     user_service: UserService = Depends(UserService),
-    jwt_manager: JWTManager = Depends(JWTManager),
 ):
     # Fetch the user by username
-    user = user_service.get_user_by_username(db, body.username)
+    user = await run_in_threadpool(user_service.get_user_by_username, db, body.username)
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid username"
         )
 
     # Verify the password
-    if not hash_handler.verify_password(body.password, user.password):
+    if not await hash_handler.verify_password(body.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid password"
         )
@@ -0,0 +1,186 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from app.routers.contacts import schemas
+from db.database import get_async_db
+from app.helpers.api.read_routing import get_async_read_db
+from app.services.contacts.async_contact_service import AsyncContactService
+from app.services.auth.jwt_manager import jwt_manager
+from db.models.user import User
+from app.helpers.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.helpers.api.fieldsets import contact_fieldset
+from app.helpers.api.ids import parse_ids
+from app.helpers.api.responses import trusted_json
+from app.repositories.contacts.projection import Fieldset
+from app.settings import settings
+
+# AsyncSession versions of the contact routes. Mounted ahead of the sync router
+# when settings.DB_ASYNC is enabled, so the two paths can be A/B tested.
+# contact_id uses the int convertor so non-numeric paths fall through.
+
+router = APIRouter(
+    prefix="/api/contacts",
+    tags=["contacts"],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/", response_model=schemas.Contact, status_code=status.HTTP_201_CREATED)
+async def create_contact(
+    contact: schemas.ContactCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    return await contact_service.create_contact(
+        db=db, contact_data=contact, user_id=current_user.id
+    )
+
+
+@router.get("/", response_model=schemas.ContactPage)
+async def read_contacts(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=settings.CONTACTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    sort: schemas.ContactSort = schemas.ContactSort.last_name,
+    ids: Optional[List[str]] = Query(None, description="Comma-separated ids"),
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    # Any write to the user's contacts changes the book version, and with it
+    # the ETag of every listing
+    version = await contact_service.get_book_version(db, user_id=current_user.id)
+    etag = make_etag(current_user.id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    if ids:
+        # Multi-get: one IN query instead of a request per contact
+        page = await contact_service.get_contacts_by_ids(
+            db,
+            user_id=current_user.id,
+            ids=parse_ids(ids, settings.CONTACTS_BATCH_MAX_SIZE),
+            fieldset=fieldset,
+        )
+        return trusted_json(page, response)
+    page = await contact_service.get_contacts(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        cursor=cursor,
+        sort=sort.value,
+        fieldset=fieldset,
+    )
+    return trusted_json(page, response)
+
+
+@router.get("/{contact_id:int}", response_model=schemas.Contact)
+async def read_contact(
+    contact_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    # Only the version is read to answer a conditional request
+    version = await contact_service.get_contact_version(
+        db, contact_id=contact_id, user_id=current_user.id
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    etag = make_etag(contact_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    db_contact = await contact_service.get_contact(
+        db, contact_id=contact_id, user_id=current_user.id
+    )
+    if db_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return db_contact
+
+
+@router.put("/{contact_id:int}", response_model=schemas.Contact)
+async def update_contact(
+    contact_id: int,
+    contact: schemas.ContactUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    db_contact = await contact_service.update_contact(
+        db, contact_id=contact_id, contact_data=contact, user_id=current_user.id
+    )
+    if db_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return db_contact
+
+
+@router.delete("/{contact_id:int}", response_model=schemas.Contact)
+async def delete_contact(
+    contact_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    db_contact = await contact_service.delete_contact(
+        db, contact_id=contact_id, user_id=current_user.id
+    )
+    if db_contact is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    return db_contact
+
+
+@router.get("/search/", response_model=schemas.ContactPage)
+async def search_contacts(
+    q: Optional[str] = Query(None, max_length=200),
+    name: Optional[str] = None,
+    lastname: Optional[str] = None,
+    email: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=settings.CONTACTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    page = await contact_service.search_contacts(
+        db,
+        user_id=current_user.id,
+        q=q,
+        name=name,
+        lastname=lastname,
+        email=email,
+        limit=limit,
+        cursor=cursor,
+        fieldset=fieldset,
+    )
+    return trusted_json(page)
+
+
+@router.get("/stats", response_model=schemas.ContactStats)
+async def contact_stats(
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    # Read from the per-user counters, the contacts are not scanned
+    return await contact_service.get_contact_stats(db, user_id=current_user.id)
+
+
+@router.get("/birthdays/", response_model=List[schemas.Contact])
+async def contacts_with_upcoming_birthdays(
+    days: int = Query(7, ge=0, le=365),
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user_async),
+    contact_service: AsyncContactService = Depends(AsyncContactService),
+):
+    contacts = await contact_service.get_contacts_with_upcoming_birthdays(
+        db, user_id=current_user.id, days=days, fieldset=fieldset
+    )
+    return trusted_json(contacts)
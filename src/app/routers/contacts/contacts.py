@@ -1,12 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import io
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 from app.routers.contacts import schemas
-from db.database import get_db
+from fastapi.responses import StreamingResponse
+from db.database import get_db, SessionLocal
+from app.helpers.api.read_routing import get_read_db
 from app.services.contacts.contact_service import ContactService
 from app.services.user.user_service import UserService
-from app.services.auth.jwt_manager import JWTManager
+from app.services.auth.jwt_manager import jwt_manager
 from db.models.user import User
+from app.helpers.api.etag import etag_matches, make_etag, not_modified, set_etag
+from app.helpers.api.fieldsets import contact_fieldset
+from app.helpers.api.ids import parse_ids
+from app.helpers.api.responses import trusted_json
+from app.helpers.api.uploads import FILE_UPLOAD_BODY, read_upload
+from app.repositories.contacts.projection import Fieldset
+from app.settings import settings
 
 router = APIRouter(
     prefix="/api/contacts",
@@ -19,7 +38,7 @@ router = APIRouter(
 def create_contact(
     contact: schemas.ContactCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
     return contact_service.create_contact(
@@ -27,27 +46,148 @@ def create_contact(
     )
 
 
-@router.get("/", response_model=List[schemas.Contact])
-def read_contacts(
-    skip: int = 0,
-    limit: int = 10,
+@router.post(
+    "/import",
+    response_model=schemas.ImportReport,
+    description="Uploads are limited to CONTACTS_IMPORT_MAX_BYTES, larger ones "
+    "are answered with 413 before any row is imported",
+    openapi_extra=FILE_UPLOAD_BODY,
+)
+async def import_contacts(
+    request: Request,
+    fmt: Optional[schemas.ImportFormat] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
+    contact_service: ContactService = Depends(ContactService),
+):
+    # The multipart body is streamed with a size cap instead of being spooled
+    # to a temporary file first, so an oversized file is refused as it arrives
+    upload = await read_upload(request, "file", settings.CONTACTS_IMPORT_MAX_BYTES)
+    if fmt is None:
+        # Fall back to the file extension / content type of the upload
+        name = (upload.filename or "").lower()
+        if name.endswith(".csv") or upload.content_type == "text/csv":
+            fmt = schemas.ImportFormat.csv
+        elif name.endswith((".ndjson", ".jsonl")):
+            fmt = schemas.ImportFormat.ndjson
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Unknown import format, pass format=csv or format=ndjson",
+            )
+    # The rows are written with the blocking session, off the event loop
+    return await run_in_threadpool(
+        contact_service.import_contacts,
+        db,
+        file=io.BytesIO(upload.data),
+        fmt=fmt.value,
+        user_id=current_user.id,
+    )
+
+
+@router.post("/batch", response_model=schemas.BatchReport)
+def batch_contacts(
+    batch: schemas.BatchRequest,
     db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
+    contact_service: ContactService = Depends(ContactService),
+):
+    if len(batch.operations) > settings.CONTACTS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.CONTACTS_BATCH_MAX_SIZE} operations per batch",
+        )
+    return contact_service.run_batch(
+        db, operations=batch.operations, user_id=current_user.id
+    )
+
+
+@router.get("/export", response_class=StreamingResponse)
+def export_contacts(
+    fmt: schemas.ExportFormat = Query(schemas.ExportFormat.ndjson, alias="format"),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
+    contact_service: ContactService = Depends(ContactService),
+):
+    media_types = {
+        schemas.ExportFormat.ndjson: ("application/x-ndjson", "ndjson"),
+        schemas.ExportFormat.csv: ("text/csv", "csv"),
+        schemas.ExportFormat.vcard: ("text/vcard", "vcf"),
+    }
+    media_type, extension = media_types[fmt]
+    user_id = current_user.id
+
+    def stream():
+        # The body is produced after the request dependencies are torn down,
+        # so the export holds its own session for the whole stream
+        with SessionLocal() as db:
+            yield from contact_service.export_contacts(db, user_id, fmt.value)
+
+    return StreamingResponse(
+        stream(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="contacts.{extension}"'},
+    )
+
+
+@router.get("/", response_model=schemas.ContactPage)
+def read_contacts(
+    request: Request,
+    response: Response,
+    limit: int = Query(10, ge=1, le=settings.CONTACTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    sort: schemas.ContactSort = schemas.ContactSort.last_name,
+    ids: Optional[List[str]] = Query(None, description="Comma-separated ids"),
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
-    contacts = contact_service.get_contacts(
-        db, user_id=current_user.id, skip=skip, limit=limit
+    # Any write to the user's contacts changes the book version, and with it
+    # the ETag of every listing
+    version = contact_service.get_book_version(db, user_id=current_user.id)
+    etag = make_etag(current_user.id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
+    if ids:
+        # Multi-get: one IN query instead of a request per contact
+        page = contact_service.get_contacts_by_ids(
+            db,
+            user_id=current_user.id,
+            ids=parse_ids(ids, settings.CONTACTS_BATCH_MAX_SIZE),
+            fieldset=fieldset,
+        )
+        return trusted_json(page, response)
+    page = contact_service.get_contacts(
+        db,
+        user_id=current_user.id,
+        limit=limit,
+        cursor=cursor,
+        sort=sort.value,
+        fieldset=fieldset,
     )
-    return contacts
+    return trusted_json(page, response)
 
 
-@router.get("/{contact_id}", response_model=schemas.Contact)
+@router.get("/{contact_id:int}", response_model=schemas.Contact)
 def read_contact(
     contact_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
+    # Only the version is read to answer a conditional request
+    version = contact_service.get_contact_version(
+        db, contact_id=contact_id, user_id=current_user.id
+    )
+    if version is None:
+        raise HTTPException(status_code=404, detail="Contact not found")
+    etag = make_etag(contact_id, version)
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     db_contact = contact_service.get_contact(
         db, contact_id=contact_id, user_id=current_user.id
     )
@@ -56,12 +196,12 @@ def read_contact(
     return db_contact
 
 
-@router.put("/{contact_id}", response_model=schemas.Contact)
+@router.put("/{contact_id:int}", response_model=schemas.Contact)
 def update_contact(
     contact_id: int,
     contact: schemas.ContactUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
     db_contact = contact_service.update_contact(
@@ -72,11 +212,11 @@ def update_contact(
     return db_contact
 
 
-@router.delete("/{contact_id}", response_model=schemas.Contact)
+@router.delete("/{contact_id:int}", response_model=schemas.Contact)
 def delete_contact(
     contact_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
     db_contact = contact_service.delete_contact(
@@ -87,28 +227,52 @@ def delete_contact(
     return db_contact
 
 
-@router.get("/search/", response_model=List[schemas.Contact])
+@router.get("/search/", response_model=schemas.ContactPage)
 def search_contacts(
+    q: Optional[str] = Query(None, max_length=200),
     name: Optional[str] = None,
     lastname: Optional[str] = None,
     email: Optional[str] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    limit: int = Query(10, ge=1, le=settings.CONTACTS_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
-    contacts = contact_service.get_contact_by_name_lastname_email(
-        db, user_id=current_user.id, name=name, lastname=lastname, email=email
+    page = contact_service.search_contacts(
+        db,
+        user_id=current_user.id,
+        q=q,
+        name=name,
+        lastname=lastname,
+        email=email,
+        limit=limit,
+        cursor=cursor,
+        fieldset=fieldset,
     )
-    return contacts
+    return trusted_json(page)
+
+
+@router.get("/stats", response_model=schemas.ContactStats)
+def contact_stats(
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
+    contact_service: ContactService = Depends(ContactService),
+):
+    # Read from the per-user counters, the contacts are not scanned
+    return contact_service.get_contact_stats(db, user_id=current_user.id)
 
 
 @router.get("/birthdays/", response_model=List[schemas.Contact])
 def contacts_with_upcoming_birthdays(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(JWTManager().get_current_user),  # Inject current user
+    days: int = Query(7, ge=0, le=365),
+    fieldset: Fieldset = Depends(contact_fieldset),
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(jwt_manager.get_current_user),  # Inject current user
     contact_service: ContactService = Depends(ContactService),
 ):
     contacts = contact_service.get_contacts_with_upcoming_birthdays(
-        db, user_id=current_user.id
+        db, user_id=current_user.id, days=days, fieldset=fieldset
     )
-    return contacts
+    return trusted_json(contacts)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
-from typing import List, Optional
+from pydantic import BaseModel, EmailStr, Field, field_validator
+from typing import Annotated, List, Literal, Optional, Union
 from datetime import date
+from enum import Enum
 
 
 class EmailBase(BaseModel):
@@ -71,6 +72,14 @@ class ContactUpdate(BaseModel):
     phones: Optional[List[PhoneCreate]] = None
     additional_data: Optional[List[AdditionalDataCreate]] = None
 
+    @field_validator("first_name", "last_name")
+    @classmethod
+    def name_not_null(cls, value: Optional[str]) -> str:
+        # Left out keeps the current name, null is not a name
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
 
 class Contact(ContactBase):
     id: int
@@ -80,3 +89,83 @@ class Contact(ContactBase):
 
     class Config:
         from_attributes = True
+
+
+class ContactPage(BaseModel):
+    items: List[Contact]
+    next_cursor: Optional[str] = None
+
+
+class ContactStats(BaseModel):
+    contacts: int
+    without_email: int
+    without_phone: int
+    without_birthday: int
+    birthdays_this_month: int
+    # January first
+    birthdays_by_month: List[int]
+
+
+class ContactSort(str, Enum):
+    last_name = "last_name"
+    first_name = "first_name"
+    id = "id"
+
+
+class ImportFormat(str, Enum):
+    csv = "csv"
+    ndjson = "ndjson"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+    vcard = "vcard"
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError] = []
+
+
+class BatchCreate(BaseModel):
+    op: Literal["create"]
+    contact: ContactCreate
+
+
+class BatchUpdate(BaseModel):
+    op: Literal["update"]
+    id: int
+    contact: ContactUpdate
+
+
+class BatchDelete(BaseModel):
+    op: Literal["delete"]
+    id: int
+
+
+class BatchRequest(BaseModel):
+    operations: List[
+        Annotated[
+            Union[BatchCreate, BatchUpdate, BatchDelete], Field(discriminator="op")
+        ]
+    ] = Field(..., min_length=1)
+
+
+class BatchResult(BaseModel):
+    index: int
+    op: str
+    status: int
+    id: Optional[int] = None
+    contact: Optional[Contact] = None
+    error: Optional[str] = None
+
+
+class BatchReport(BaseModel):
+    results: List[BatchResult]
@@ -1,26 +1,25 @@
 from fastapi import (
     APIRouter,
+    BackgroundTasks,
     Depends,
     Request,
+    Response,
     HTTPException,
     status,
-    BackgroundTasks,
-    # UploadFile,
-    File,
 )
 
-from fastapi import UploadFile
 from app.services.user.user_service import UserService
 from app.services.file_services.upload_service import UploadFileService
 from app.routers.users import schemas
 from app.helpers.api.rate_limiter import limiter
 from sqlalchemy.orm import Session
 from db.database import get_db
-from fastapi_mail import ConnectionConfig
 from app.settings import settings
 from app.routers.users.schemas import RequestEmail, EmailSchema
-from app.helpers.email_sender.email import send_email
-from app.services.auth.jwt_manager import JWTManager
+from app.helpers.email_sender.email import queue_verification_email
+from app.services.email.outbox_worker import email_outbox_worker
+from app.services.auth.jwt_manager import jwt_manager
+from app.helpers.api.uploads import FILE_UPLOAD_BODY, read_upload
 from db.models.user import User
 
 
@@ -39,7 +38,7 @@ router = APIRouter(
 @limiter.limit("5/minute")
 def me(
     request: Request,
-    current_user: schemas.UserResponse = Depends(JWTManager().get_current_user),
+    current_user: schemas.UserResponse = Depends(jwt_manager.get_current_user),
 ):
     return current_user
 
@@ -49,7 +48,6 @@ def confirmed_email(
     token: str,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(UserService),
-    jwt_manager: JWTManager = Depends(JWTManager),
 ):
     email = jwt_manager.get_email_from_token(token)
     user = user_service.get_user_by_email(db, email)
@@ -66,31 +64,54 @@ def confirmed_email(
 @router.post("/request_email")
 def request_email(
     body: RequestEmail,
-    background_tasks: BackgroundTasks,
     request: Request,
     db: Session = Depends(get_db),
     user_service: UserService = Depends(UserService),
 ):
-    jwt_manager = JWTManager()
     user = user_service.get_user_by_email(db, body.email)
 
     if user.confirmed:
         return {"message": "Your email is already confirmed"}
     if user:
-        background_tasks.add_task(
-            send_email, user.email, user.username, request.base_url, jwt_manager
-        )
+        queue_verification_email(db, user.email, user.username, request.base_url)
+        email_outbox_worker.wake()
     return {"message": "Check your email for confirmation"}
 
 
-@router.patch("/avatar", response_model=schemas.UserResponse)
-def update_avatar_user(
-    file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+@router.patch(
+    "/avatar",
+    response_model=schemas.UserResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    description="The avatar is resized right away and stored in the background, "
+    "the user's avatar URL changes once the upload is done. "
+    "Re-uploading the current avatar is a no-op answered with 200",
+    openapi_extra=FILE_UPLOAD_BODY,
+)
+async def update_avatar_user(
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
     upload_service: UploadFileService = Depends(UploadFileService),
-    user_service: UserService = Depends(UserService),
-    current_user: User = Depends(JWTManager().get_current_user),
+    current_user: User = Depends(jwt_manager.get_current_user),
 ):
-    avatar_url = upload_service.upload_file(file, current_user.username)
-    updated_user = user_service.update_avatar_url(db, current_user.email, avatar_url)
-    return updated_user
+    # The multipart body is streamed with a size cap instead of being
+    # spooled to a temporary file first
+    upload = await read_upload(request, "file", settings.AVATAR_MAX_BYTES)
+    if upload.sha256 == current_user.avatar_hash:
+        # Same image as the current avatar, skip the resize, upload and write
+        response.status_code = status.HTTP_200_OK
+        return current_user
+    try:
+        avatar = await upload_service.make_avatar(upload.data)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Unsupported image"
+        )
+    background_tasks.add_task(
+        upload_service.store_avatar,
+        current_user.id,
+        current_user.email,
+        upload.sha256,
+        avatar,
+    )
+    return current_user
@@ -1,13 +1,16 @@
 from datetime import datetime, timedelta, UTC
 from typing import Optional
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
 from app.settings import settings
-from db.database import get_db
+from db.database import get_db, get_async_db
 from app.services.user.user_service import UserService
+from app.services.user.async_user_service import AsyncUserService
+from app.helpers.cache.user_cache import user_cache
+from app.services.auth.password_hasher import PasswordHasher
 from fastapi.security import OAuth2PasswordBearer
 from app.settings import settings
 
@@ -16,14 +19,20 @@ ALGORITHM = settings.ALGORITHM
 JWT_EXPIRATION_SECONDS = settings.JWT_EXPIRATION_SECONDS
 
 
-class Hash:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+password_hasher = PasswordHasher(
+    rounds=settings.BCRYPT_ROUNDS,
+    processes=settings.AUTH_HASH_PROCESSES,
+    max_concurrency=settings.AUTH_MAX_CONCURRENCY,
+)
+
 
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+class Hash:
+    # Hashing is dispatched to the bcrypt process pool, await the results
+    async def verify_password(self, plain_password, hashed_password):
+        return await password_hasher.verify(plain_password, hashed_password)
 
-    def get_password_hash(self, password: str):
-        return self.pwd_context.hash(password)
+    async def get_password_hash(self, password: str):
+        return await password_hasher.hash(password)
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=settings.OAUTH2_SCHEME)
@@ -49,24 +58,50 @@ class JWTManager:
         db: Session = Depends(get_db),
         user_service: UserService = Depends(UserService),  # Resolve dependency here
     ):
-        credentials_exception = HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Could not validate credentials",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
+        username = self._get_username_from_token(token)
+        user = user_cache.get(username)
+        if user is None:
+            user = user_service.get_user_by_username(db, username)
+            if user is None:
+                raise self._credentials_exception()
+            # Detach before caching so commits in this session don't expire it
+            db.expunge(user)
+            user_cache.set(username, user)
+        return user
 
+    async def get_current_user_async(
+        self,
+        token: str = Depends(oauth2_scheme),
+        db: AsyncSession = Depends(get_async_db),
+        user_service: AsyncUserService = Depends(AsyncUserService),
+    ):
+        username = self._get_username_from_token(token)
+        user = user_cache.get(username)
+        if user is None:
+            user = await user_service.get_user_by_username(db, username)
+            if user is None:
+                raise self._credentials_exception()
+            db.expunge(user)
+            user_cache.set(username, user)
+        return user
+
+    def _get_username_from_token(self, token: str) -> str:
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
             username = payload.get("sub")
             if username is None:
-                raise credentials_exception
+                raise self._credentials_exception()
         except JWTError:
-            raise credentials_exception
+            raise self._credentials_exception()
+        return username
 
-        user = user_service.get_user_by_username(db, username)
-        if user is None:
-            raise credentials_exception
-        return user
+    @staticmethod
+    def _credentials_exception() -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
 
     def create_email_token(self, data: dict):
         to_encode = data.copy()
@@ -87,3 +122,7 @@ class JWTManager:
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail="Wrong token for email confirmation",
             )
+
+
+# Shared by the route dependencies, one instance for the whole app
+jwt_manager = JWTManager()
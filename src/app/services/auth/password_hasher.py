@@ -0,0 +1,71 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional
+
+# bcrypt runs in a dedicated process pool: it is CPU bound and would otherwise
+# hold request threadpool slots (and the GIL) for the whole hash. The module
+# level functions below are what the worker processes execute.
+
+
+@lru_cache
+def _context(rounds: int):
+    # passlib is only imported by the worker processes, not by the web app
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+
+
+def hash_password(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def verify_password(password: str, hashed_password: str) -> bool:
+    # The cost is read from the hash itself, the rounds only matter for hashing
+    return _context(4).verify(password, hashed_password)
+
+
+def load_context(rounds: int) -> None:
+    _context(rounds)
+
+
+class PasswordHasher:
+    def __init__(self, rounds: int, processes: Optional[int], max_concurrency: int):
+        self.rounds = rounds
+        self.processes = processes or os.cpu_count() or 1
+        # Bounds concurrent auth hashing; waiting callers hold no thread
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn, as forking a process running an event loop and threads is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def _run(self, fn, *args):
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password, self.rounds)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, password, hashed_password)
+
+    async def warm(self) -> None:
+        # Starts every worker process with passlib loaded, before the first login
+        await asyncio.gather(
+            *(self._run(load_context, self.rounds) for _ in range(self.processes))
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
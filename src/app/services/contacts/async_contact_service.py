@@ -0,0 +1,156 @@
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.repositories.contacts.async_crud import AsyncContactsRepository
+from app.repositories.contacts import projection, queries
+from app.repositories.contacts.stats import summarize_stats
+from app.helpers.api.pagination import decode_cursor, paginate
+from fastapi import Depends
+from datetime import date
+from typing import List, Optional
+from db.models.contact import Contact
+
+
+class AsyncContactService:
+    def __init__(self, contacts_repository: AsyncContactsRepository = Depends()):
+        self.contacts_repository = contacts_repository
+
+    async def get_contact(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Contact:
+        return await self.contacts_repository.get_contact(db, contact_id, user_id)
+
+    async def get_contact_version(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Optional[int]:
+        return await self.contacts_repository.get_contact_version(
+            db, contact_id, user_id
+        )
+
+    async def get_book_version(self, db: AsyncSession, user_id: int) -> int:
+        return await self.contacts_repository.get_book_version(db, user_id)
+
+    async def get_contact_stats(self, db: AsyncSession, user_id: int) -> dict:
+        rows = await self.contacts_repository.get_contact_stats(db, user_id)
+        return summarize_stats(rows, date.today().month)
+
+    async def get_contacts(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        sort: str = "last_name",
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        after = None
+        if cursor:
+            types = queries.contact_sort_types(sort)
+            after = decode_cursor(cursor, sort, types)
+        # The sort key is always selected, the next cursor is built from it
+        columns = queries.contact_columns(
+            fieldset.fields, *queries.CONTACT_SORT_KEYS[sort]
+        )
+        # Fetch one extra row to find out whether there is a next page
+        rows = await self.contacts_repository.get_contacts(
+            db, user_id, limit + 1, after, sort, columns
+        )
+        page = paginate(rows, limit, sort, queries.contact_sort_values)
+        page["items"] = await self._contact_dicts(db, page["items"], fieldset)
+        return page
+
+    async def get_contacts_by_ids(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        ids: List[int],
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        rows = await self.contacts_repository.get_contact_rows_by_ids(
+            db, user_id, ids, queries.contact_columns(fieldset.fields)
+        )
+        # Returned in the requested order, ids that are not found are left out
+        by_id = {row.id: row for row in rows}
+        rows = [by_id[id_] for id_ in ids if id_ in by_id]
+        return {
+            "items": await self._contact_dicts(db, rows, fieldset),
+            "next_cursor": None,
+        }
+
+    async def create_contact(
+        self, db: AsyncSession, contact_data: dict, user_id: int
+    ) -> Contact:
+        return await self.contacts_repository.create_contact(db, contact_data, user_id)
+
+    async def update_contact(
+        self, db: AsyncSession, contact_id: int, contact_data: dict, user_id: int
+    ) -> Optional[Contact]:
+        return await self.contacts_repository.update_contact(
+            db, contact_id, contact_data, user_id
+        )
+
+    async def delete_contact(
+        self, db: AsyncSession, contact_id: int, user_id: int
+    ) -> Optional[Contact]:
+        return await self.contacts_repository.delete_contact(db, contact_id, user_id)
+
+    async def search_contacts(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        q: Optional[str] = None,
+        name: Optional[str] = None,
+        lastname: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        if q and q.strip():
+            # Ranked free-text search, the cursor carries (rank, id)
+            after = None
+            if cursor:
+                after = decode_cursor(cursor, "rank", queries.SEARCH_SORT_TYPES)
+            columns = queries.contact_columns(fieldset.fields)
+            rows = await self.contacts_repository.search_contacts(
+                db, user_id, q.strip(), name, lastname, email, limit + 1, after, columns
+            )
+            page = paginate(rows, limit, "rank", queries.search_sort_values)
+            page["items"] = await self._contact_dicts(db, page["items"], fieldset)
+            return page
+
+        after = None
+        if cursor:
+            types = queries.contact_sort_types("last_name")
+            after = decode_cursor(cursor, "last_name", types)
+        columns = queries.contact_columns(
+            fieldset.fields, *queries.CONTACT_SORT_KEYS["last_name"]
+        )
+        rows = await self.contacts_repository.get_contact_by_name_lastname_email(
+            db, user_id, name, lastname, email, limit + 1, after, columns
+        )
+        page = paginate(rows, limit, "last_name", queries.contact_sort_values)
+        page["items"] = await self._contact_dicts(db, page["items"], fieldset)
+        return page
+
+    async def get_contacts_with_upcoming_birthdays(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        days: int = 7,
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> List[dict]:
+        rows = await self.contacts_repository.get_contacts_with_upcoming_birthdays(
+            db, user_id, days, queries.contact_columns(fieldset.fields)
+        )
+        return await self._contact_dicts(db, rows, fieldset)
+
+    async def _contact_dicts(
+        self, db: AsyncSession, rows: List[Row], fieldset: projection.Fieldset
+    ) -> List[dict]:
+        # Listings are serialized from rows, see repositories/contacts/projection.py.
+        # Collections that are not included are not queried at all.
+        ids = [row.id for row in rows]
+        children = await self.contacts_repository.get_children(
+            db, ids, fieldset.include
+        )
+        return projection.contact_dicts(rows, children, fieldset.fields)
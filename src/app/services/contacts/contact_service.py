@@ -1,7 +1,17 @@
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
 from app.repositories.contacts.crud import ContactsRepository
+from app.repositories.contacts import projection, queries
+from app.repositories.contacts.stats import summarize_stats
+from app.helpers.api.pagination import decode_cursor, paginate
+from app.helpers.contacts_io.importer import iter_csv_rows, iter_ndjson_rows
+from app.helpers.contacts_io import exporter
+from app.routers.contacts.schemas import ContactCreate
+from app.settings import settings
 from fastapi import Depends
-from typing import List, Optional
+from pydantic import ValidationError
+from datetime import date
+from typing import BinaryIO, Iterator, List, Optional
 from db.models.contact import Contact
 
 
@@ -12,14 +22,128 @@ class ContactService:
     def get_contact(self, db: Session, contact_id: int, user_id: int) -> Contact:
         return self.contacts_repository.get_contact(db, contact_id, user_id)
 
+    def get_contact_version(
+        self, db: Session, contact_id: int, user_id: int
+    ) -> Optional[int]:
+        return self.contacts_repository.get_contact_version(db, contact_id, user_id)
+
+    def get_book_version(self, db: Session, user_id: int) -> int:
+        return self.contacts_repository.get_book_version(db, user_id)
+
+    def get_contact_stats(self, db: Session, user_id: int) -> dict:
+        rows = self.contacts_repository.get_contact_stats(db, user_id)
+        return summarize_stats(rows, date.today().month)
+
     def get_contacts(
-        self, db: Session, user_id: int, skip: int = 0, limit: int = 10
-    ) -> List[Contact]:
-        return self.contacts_repository.get_contacts(db, user_id, skip, limit)
+        self,
+        db: Session,
+        user_id: int,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        sort: str = "last_name",
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        after = None
+        if cursor:
+            types = queries.contact_sort_types(sort)
+            after = decode_cursor(cursor, sort, types)
+        # The sort key is always selected, the next cursor is built from it
+        columns = queries.contact_columns(
+            fieldset.fields, *queries.CONTACT_SORT_KEYS[sort]
+        )
+        # Fetch one extra row to find out whether there is a next page
+        rows = self.contacts_repository.get_contacts(
+            db, user_id, limit + 1, after, sort, columns
+        )
+        page = paginate(rows, limit, sort, queries.contact_sort_values)
+        page["items"] = self._contact_dicts(db, page["items"], fieldset)
+        return page
+
+    def get_contacts_by_ids(
+        self,
+        db: Session,
+        user_id: int,
+        ids: List[int],
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        rows = self.contacts_repository.get_contact_rows_by_ids(
+            db, user_id, ids, queries.contact_columns(fieldset.fields)
+        )
+        # Returned in the requested order, ids that are not found are left out
+        by_id = {row.id: row for row in rows}
+        rows = [by_id[id_] for id_ in ids if id_ in by_id]
+        return {
+            "items": self._contact_dicts(db, rows, fieldset),
+            "next_cursor": None,
+        }
 
     def create_contact(self, db: Session, contact_data: dict, user_id: int) -> Contact:
         return self.contacts_repository.create_contact(db, contact_data, user_id)
 
+    def import_contacts(
+        self, db: Session, file: BinaryIO, fmt: str, user_id: int
+    ) -> dict:
+        # Rows are validated as they are read and written in batches, so memory
+        # use is bounded by the batch size, not by the upload
+        rows = iter_csv_rows(file) if fmt == "csv" else iter_ndjson_rows(file)
+        imported, failed, errors, batch = 0, 0, [], []
+
+        def flush():
+            nonlocal imported, failed
+            rejected, skipped = self.contacts_repository.bulk_create_contacts(
+                db, batch, user_id
+            )
+            db.commit()
+            imported += len(batch) - len(rejected)
+            failed += len(rejected)
+            errors.extend(rejected + skipped)
+            batch.clear()
+
+        for row_number, data in rows:
+            try:
+                if isinstance(data, ValueError):
+                    raise data
+                batch.append((row_number, ContactCreate.model_validate(data)))
+            except (ValueError, ValidationError) as err:
+                failed += 1
+                errors.append((row_number, _describe_error(err)))
+                continue
+            if len(batch) >= settings.CONTACTS_IMPORT_BATCH_SIZE:
+                flush()
+        if batch:
+            flush()
+
+        errors.sort()
+        return {
+            "imported": imported,
+            "failed": failed,
+            "errors": [
+                {"row": row, "error": error}
+                for row, error in errors[: settings.CONTACTS_IMPORT_MAX_ERRORS]
+            ],
+        }
+
+    def run_batch(self, db: Session, operations: List, user_id: int) -> dict:
+        return {"results": self.contacts_repository.run_batch(db, operations, user_id)}
+
+    def export_contacts(self, db: Session, user_id: int, fmt: str) -> Iterator[str]:
+        serializers = {
+            "ndjson": exporter.iter_ndjson,
+            "csv": exporter.iter_csv,
+            "vcard": exporter.iter_vcard,
+        }
+        contacts = self.contacts_repository.iter_contacts(db, user_id)
+        # Group the per-contact pieces into chunks of ~64KB for the response
+        chunk, size = [], 0
+        for piece in serializers[fmt](contacts):
+            chunk.append(piece)
+            size += len(piece)
+            if size >= 64 * 1024:
+                yield "".join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield "".join(chunk)
+
     def update_contact(
         self, db: Session, contact_id: int, contact_data: dict, user_id: int
     ) -> Optional[Contact]:
@@ -32,21 +156,72 @@ class ContactService:
     ) -> Optional[Contact]:
         return self.contacts_repository.delete_contact(db, contact_id, user_id)
 
-    def get_contact_by_name_lastname_email(
+    def search_contacts(
         self,
         db: Session,
         user_id: int,
-        name: Optional[str],
-        lastname: Optional[str],
-        email: Optional[str],
-    ) -> List[Contact]:
-        return self.contacts_repository.get_contact_by_name_lastname_email(
-            db, user_id, name, lastname, email
+        q: Optional[str] = None,
+        name: Optional[str] = None,
+        lastname: Optional[str] = None,
+        email: Optional[str] = None,
+        limit: int = 10,
+        cursor: Optional[str] = None,
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> dict:
+        if q and q.strip():
+            # Ranked free-text search, the cursor carries (rank, id)
+            after = None
+            if cursor:
+                after = decode_cursor(cursor, "rank", queries.SEARCH_SORT_TYPES)
+            columns = queries.contact_columns(fieldset.fields)
+            rows = self.contacts_repository.search_contacts(
+                db, user_id, q.strip(), name, lastname, email, limit + 1, after, columns
+            )
+            page = paginate(rows, limit, "rank", queries.search_sort_values)
+            page["items"] = self._contact_dicts(db, page["items"], fieldset)
+            return page
+
+        after = None
+        if cursor:
+            types = queries.contact_sort_types("last_name")
+            after = decode_cursor(cursor, "last_name", types)
+        columns = queries.contact_columns(
+            fieldset.fields, *queries.CONTACT_SORT_KEYS["last_name"]
         )
+        rows = self.contacts_repository.get_contact_by_name_lastname_email(
+            db, user_id, name, lastname, email, limit + 1, after, columns
+        )
+        page = paginate(rows, limit, "last_name", queries.contact_sort_values)
+        page["items"] = self._contact_dicts(db, page["items"], fieldset)
+        return page
 
     def get_contacts_with_upcoming_birthdays(
-        self, db: Session, user_id: int
-    ) -> List[Contact]:
-        return self.contacts_repository.get_contacts_with_upcoming_birthdays(
-            db, user_id
+        self,
+        db: Session,
+        user_id: int,
+        days: int = 7,
+        fieldset: projection.Fieldset = projection.FULL,
+    ) -> List[dict]:
+        rows = self.contacts_repository.get_contacts_with_upcoming_birthdays(
+            db, user_id, days, queries.contact_columns(fieldset.fields)
+        )
+        return self._contact_dicts(db, rows, fieldset)
+
+    def _contact_dicts(
+        self, db: Session, rows: List[Row], fieldset: projection.Fieldset
+    ) -> List[dict]:
+        # Listings are serialized from rows, see repositories/contacts/projection.py.
+        # Collections that are not included are not queried at all.
+        children = self.contacts_repository.get_children(
+            db, [row.id for row in rows], fieldset.include
+        )
+        return projection.contact_dicts(rows, children, fieldset.fields)
+
+
+def _describe_error(err: Exception) -> str:
+    if isinstance(err, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}"
+            for e in err.errors()
         )
+    return str(err)
@@ -0,0 +1,73 @@
+"""Recount the per-user contact stats and repair the ones that drifted.
+
+The stats are kept up to date by the contact writes themselves, this job is
+the safety net: after a restore, a manual fix in the database or a bug in a
+write path. Users are checked in batches of ids, each batch in a transaction
+of its own, so it can run against a live database.
+
+    cd src && python -m app.services.contacts.reconcile_stats --batch-size 500
+    cd src && python -m app.services.contacts.reconcile_stats --user-id 1 --user-id 2
+"""
+
+import argparse
+import logging
+from typing import Iterator, List, Optional, Sequence
+
+from app.repositories.contacts import queries
+from app.repositories.contacts.crud import ContactsRepository
+from db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def user_id_batches(
+    batch_size: int, session_factory=SessionLocal
+) -> Iterator[List[int]]:
+    after = 0
+    while True:
+        with session_factory() as db:
+            user_ids = list(db.scalars(queries.select_user_ids(after, batch_size)))
+        if not user_ids:
+            return
+        yield user_ids
+        after = user_ids[-1]
+
+
+def reconcile_stats(
+    user_ids: Optional[Sequence[int]] = None,
+    batch_size: int = 500,
+    session_factory=SessionLocal,
+    contacts_repository: Optional[ContactsRepository] = None,
+) -> int:
+    """Reconcile the given users, or every user. Returns how many drifted."""
+    contacts_repository = contacts_repository or ContactsRepository()
+    if user_ids:
+        batches = (
+            list(user_ids[i : i + batch_size])
+            for i in range(0, len(user_ids), batch_size)
+        )
+    else:
+        batches = user_id_batches(batch_size, session_factory)
+
+    checked = drifted = 0
+    for batch in batches:
+        with session_factory() as db:
+            repaired = contacts_repository.reconcile_contact_stats(db, batch)
+            db.commit()
+        checked += len(batch)
+        drifted += len(repaired)
+        if repaired:
+            logger.warning("Contact stats drifted for users %s", repaired)
+    logger.info("Checked the contact stats of %s users, %s drifted", checked, drifted)
+    return drifted
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", type=int, action="append", help="only these users")
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="users per transaction"
+    )
+    args = parser.parse_args()
+    reconcile_stats(args.user_id, args.batch_size)
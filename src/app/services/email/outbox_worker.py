@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.helpers.email_sender.email import (
+    SMTPTransport,
+    build_message,
+    compile_email_templates,
+    renderers,
+)
+from app.repositories.email_outbox.outbox import EmailOutboxRepository
+from app.settings import settings
+from db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed batch stays reserved for the worker that claimed it
+LEASE_SECONDS = 300
+
+
+class EmailOutboxWorker:
+    def __init__(
+        self,
+        transport: Optional[SMTPTransport] = None,
+        outbox_repository: Optional[EmailOutboxRepository] = None,
+        session_factory=SessionLocal,
+    ):
+        self.transport = transport or SMTPTransport()
+        self.outbox_repository = outbox_repository or EmailOutboxRepository()
+        self.session_factory = session_factory
+        self._wakeup = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    def wake(self) -> None:
+        # Called after enqueueing, so new mail does not wait for the next poll.
+        # Safe from request threads, a no-op when the worker runs elsewhere.
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # The flag ends the loop even if the cancellation gets swallowed,
+            # which asyncio.wait_for can do before Python 3.12
+            self._stopping = True
+            self._wakeup.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._loop = None
+        await self.transport.close()
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        while not self._stopping:
+            self._wakeup.clear()
+            try:
+                sent = await self.drain_once()
+            except Exception:
+                logger.exception("Email outbox batch failed")
+                sent = 0
+            if sent >= settings.EMAIL_OUTBOX_BATCH_SIZE:
+                continue  # More may be waiting, go straight to the next batch
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), settings.EMAIL_OUTBOX_POLL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def drain_once(self) -> int:
+        # The DB work is blocking, it runs in a thread off the event loop
+        batch = await asyncio.to_thread(self._claim)
+        sent, failed = [], []
+        try:
+            for id, recipient, subject, template, context, attempts in batch:
+                # A message that cannot be rendered or sent fails on its own,
+                # it does not hold back the rest of the batch
+                try:
+                    html = renderers[template](recipient, context)
+                    await self.transport.send(build_message(recipient, subject, html))
+                    sent.append(id)
+                except Exception as err:
+                    failed.append((id, attempts, f"{type(err).__name__}: {err}"))
+        finally:
+            # Recorded even when the batch is cut short, so messages that went
+            # out are not sent again once their lease runs out
+            await asyncio.to_thread(self._finish, sent, failed)
+        return len(batch)
+
+    def _claim(self) -> List[tuple]:
+        with self.session_factory(expire_on_commit=False) as db:
+            messages = self.outbox_repository.claim_batch(
+                db, settings.EMAIL_OUTBOX_BATCH_SIZE, LEASE_SECONDS
+            )
+            return [
+                (m.id, m.recipient, m.subject, m.template, m.context, m.attempts)
+                for m in messages
+            ]
+
+    def _finish(self, sent: List[int], failed: List[Tuple[int, int, str]]) -> None:
+        with self.session_factory() as db:
+            self.outbox_repository.mark_sent(db, sent)
+            for id, attempts, error in failed:
+                logger.warning("Email %s failed (attempt %s): %s", id, attempts, error)
+                self.outbox_repository.mark_failed(db, id, error, retry_delay(attempts))
+
+
+def retry_delay(attempts: int) -> Optional[float]:
+    # Exponential backoff, None once the attempts are used up
+    if attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        return None
+    return min(
+        settings.EMAIL_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1),
+        settings.EMAIL_OUTBOX_MAX_BACKOFF_SECONDS,
+    )
+
+
+email_outbox_worker = EmailOutboxWorker()
+
+
+if __name__ == "__main__":
+    # Standalone worker, for deployments running it apart from the web app
+    logging.basicConfig(level=logging.INFO)
+    if not settings.MAIL_ENABLED:
+        raise SystemExit("The outbox worker needs MAIL_ENABLED=true and MAIL_* set")
+    compile_email_templates()
+    asyncio.run(email_outbox_worker.run())
@@ -0,0 +1,71 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+# Avatars are resized to the 250x250 thumbnail in a process pool: decoding
+# and resampling are CPU bound and would otherwise hold the GIL and a
+# request thread. make_thumbnail is what the worker processes execute.
+
+# Refuse images that would decode to more pixels than this (decompression bombs)
+MAX_PIXELS = 40_000_000
+
+
+def make_thumbnail(data: bytes, size: int) -> bytes:
+    # Pillow is only imported by the worker processes, not by the web app
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    Image.MAX_IMAGE_PIXELS = MAX_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            # Honour the camera orientation, then crop to fill the square
+            image = ImageOps.exif_transpose(image)
+            thumbnail = ImageOps.fit(
+                image.convert("RGB"), (size, size), Image.Resampling.LANCZOS
+            )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as err:
+        raise ValueError(f"Not a supported image: {err}") from None
+    output = io.BytesIO()
+    thumbnail.save(output, format="JPEG", quality=85, optimize=True)
+    return output.getvalue()
+
+
+def load_pillow() -> None:
+    from PIL import Image
+
+    # Registers the format plugins, which Image.open would do on first use
+    Image.init()
+
+
+class ImageProcessor:
+    def __init__(self, processes: int):
+        self.processes = processes
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def thumbnail(self, data: bytes, size: int) -> bytes:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), make_thumbnail, data, size)
+
+    async def warm(self) -> None:
+        # Starts the worker processes with Pillow loaded, before the first upload
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(
+            *(
+                loop.run_in_executor(self._pool(), load_pillow)
+                for _ in range(self.processes)
+            )
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
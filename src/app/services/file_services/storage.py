@@ -0,0 +1,75 @@
+import os
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+
+from starlette.staticfiles import StaticFiles
+from app.settings import settings
+
+# Where avatar images end up. Backends take the final image bytes and return
+# the public URL; they are blocking and run off the event loop. Keys are
+# content addressed, so an existing key already holds the same image.
+
+
+class AvatarStorage(ABC):
+    @abstractmethod
+    def save(self, key: str, data: bytes, content_type: str) -> str:
+        ...
+
+
+class CloudinaryStorage(AvatarStorage):
+    def __init__(self):
+        # Imported here so processes storing avatars locally never load the SDK
+        import cloudinary
+        import cloudinary.uploader
+
+        self.uploader = cloudinary.uploader
+        # Configured once per process instead of on every request
+        cloudinary.config(
+            cloud_name=settings.CLOUDINARY_NAME,
+            api_key=settings.CLOUDINARY_API_KEY,
+            api_secret=settings.CLOUDINARY_API_SECRET,
+            secure=True,
+        )
+
+    def save(self, key: str, data: bytes, content_type: str) -> str:
+        r = self.uploader.upload(data, public_id=key, overwrite=False)
+        return r["secure_url"]
+
+
+class LocalStorage(AvatarStorage):
+    # Files under AVATAR_LOCAL_DIR, served by the app at AVATAR_LOCAL_URL
+
+    def __init__(self, root: Path, base_url: str):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def save(self, key: str, data: bytes, content_type: str) -> str:
+        path = self.root / f"{key}.jpg"
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written next to the target and renamed, readers never see half a file
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return f"{self.base_url}/{key}.jpg"
+
+
+class AvatarStaticFiles(StaticFiles):
+    # Serves LocalStorage files; a content-addressed file never changes, so
+    # clients and proxies may cache it for good
+    IMMUTABLE_NAME = re.compile(r"[0-9a-f]{64}\.jpg")
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self.IMMUTABLE_NAME.fullmatch(os.path.basename(full_path)):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+
+@lru_cache
+def get_avatar_storage() -> AvatarStorage:
+    if settings.AVATAR_STORAGE == "local":
+        return LocalStorage(Path(settings.AVATAR_LOCAL_DIR), settings.AVATAR_LOCAL_URL)
+    return CloudinaryStorage()
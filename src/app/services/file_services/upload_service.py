@@ -1,26 +1,55 @@
-import cloudinary
-import cloudinary.uploader
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import Depends
+from app.services.file_services.images import ImageProcessor
+from app.services.file_services.storage import get_avatar_storage
+from app.services.user.user_service import UserService
 from app.settings import settings
+from db.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+image_processor = ImageProcessor(processes=settings.AVATAR_RESIZE_PROCESSES)
+
+# Storage uploads are blocking network calls, they get their own small pool
+# so they never occupy the request threadpool
+upload_executor = ThreadPoolExecutor(
+    max_workers=settings.AVATAR_UPLOAD_THREADS, thread_name_prefix="avatar-upload"
+)
 
 
 class UploadFileService:
-    def __init__(self):
-        # Initialize Cloudinary configuration here, to make it easier
-        self.cloud_name = settings.CLOUDINARY_NAME
-        self.api_key = settings.CLOUDINARY_API_KEY
-        self.api_secret = settings.CLOUDINARY_API_SECRET
-        cloudinary.config(
-            cloud_name=self.cloud_name,
-            api_key=self.api_key,
-            api_secret=self.api_secret,
-            secure=True,
-        )
-
-    @staticmethod
-    def upload_file(file, username) -> str:
-        public_id = f"RestApp/{username}"
-        r = cloudinary.uploader.upload(file.file, public_id=public_id, overwrite=True)
-        src_url = cloudinary.CloudinaryImage(public_id).build_url(
-            width=250, height=250, crop="fill", version=r.get("version")
-        )
-        return src_url
+    def __init__(self, user_service: UserService = Depends()):
+        self.storage = get_avatar_storage()
+        self.user_service = user_service
+
+    async def make_avatar(self, data: bytes) -> bytes:
+        # Raises ValueError when the upload is not a readable image
+        return await image_processor.thumbnail(data, settings.AVATAR_SIZE)
+
+    async def store_avatar(
+        self, user_id: int, email: str, source_hash: str, avatar: bytes
+    ) -> None:
+        # Dispatched after the response: upload, then point the user at it
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(
+                upload_executor, self._store_avatar, email, source_hash, avatar
+            )
+        except Exception:
+            logger.exception("Storing the avatar of user %s failed", user_id)
+
+    def _store_avatar(self, email: str, source_hash: str, avatar: bytes) -> None:
+        with SessionLocal() as db:
+            # A concurrent upload of the same image may have finished meanwhile
+            if (
+                self.user_service.get_user_by_email(db, email).avatar_hash
+                == source_hash
+            ):
+                return
+            # Keyed by the uploaded content, the same image maps to the same URL
+            url = self.storage.save(
+                f"RestApp/avatars/{source_hash}", avatar, "image/jpeg"
+            )
+            self.user_service.update_avatar_url(db, email, url, source_hash)
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
 from fastapi import Depends
+from typing import Optional
 from app.repositories.users.users import UsersRepository
 
 
@@ -22,5 +23,7 @@ class UserService:
     def confirmed_email(self, db: Session, email: str):
         return self.users_repository.confirmed_email(db, email)
 
-    def update_avatar_url(self, db: Session, email: str, url: str):
-        return self.users_repository.update_avatar_url(db, email, url)
+    def update_avatar_url(
+        self, db: Session, email: str, url: str, avatar_hash: Optional[str] = None
+    ):
+        return self.users_repository.update_avatar_url(db, email, url, avatar_hash)
@@ -1,7 +1,7 @@
 from pathlib import Path
 from pydantic_settings import BaseSettings
-from pydantic import EmailStr
-from typing import ClassVar
+from pydantic import EmailStr, model_validator
+from typing import ClassVar, Optional
 
 
 class Settings(BaseSettings):
@@ -9,6 +9,27 @@ class Settings(BaseSettings):
     # Local DB configuration
     DATABASE_URL: str
 
+    # Async DB access (asyncpg); DB_ASYNC switches the contact routes to AsyncSession.
+    # ASYNC_DATABASE_URL defaults to DATABASE_URL with the asyncpg driver.
+    DB_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool of every engine: pooled connections, extra ones allowed
+    # under load, seconds to wait for one, max connection age (-1 keeps them
+    # forever) and a liveness check on checkout
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # Read replica serving the contact reads (list, get, search, birthdays).
+    # A user's reads stay on the primary for READ_YOUR_WRITES_SECONDS after
+    # they write. ASYNC_READ_REPLICA_URL defaults like ASYNC_DATABASE_URL.
+    READ_REPLICA_URL: Optional[str] = None
+    ASYNC_READ_REPLICA_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 5
+
     # Token configuration for JWT authentication
     SECRET_KEY: str
     ALGORITHM: str
@@ -19,22 +40,87 @@ class Settings(BaseSettings):
 
     OAUTH2_SCHEME: str = "/api/auth/login"
 
-    # Email configuration for sending emails
-    MAIL_USERNAME: EmailStr
-    MAIL_PASSWORD: str
-    MAIL_FROM: EmailStr
-    MAIL_PORT: int
-    MAIL_SERVER: str
+    # Cache of authenticated users resolved from JWT subjects (0 disables it)
+    USER_CACHE_MAX_SIZE: int = 10_000
+    USER_CACHE_TTL_SECONDS: float = 60
+
+    # bcrypt cost for new password hashes, the size of the hashing process pool
+    # (defaults to the CPU count) and how many auth hashes may run at once
+    BCRYPT_ROUNDS: int = 12
+    AUTH_HASH_PROCESSES: Optional[int] = None
+    AUTH_MAX_CONCURRENCY: int = 16
+
+    # Rate limiter counters: memory:// keeps them per process, redis://host:6379/0
+    # or memcached://host:11211 share them across workers (needs the redis or
+    # pymemcache client). sliding-window-counter keeps two counters per key,
+    # expired keys are evicted by the storage.
+    RATE_LIMIT_STORAGE_URI: str = "memory://"
+    RATE_LIMIT_STRATEGY: str = "sliding-window-counter"
+
+    # Prometheus metrics served at METRICS_PATH: request latency, in-flight
+    # requests, SQL per request, connection pool and threadpool usage
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+
+    # Hard cap for the page size of contact listings
+    CONTACTS_PAGE_MAX_LIMIT: int = 100
+
+    # Bulk import: rows per INSERT batch/commit, row errors kept in the report,
+    # and the upload size limit (the file is held in memory while it is imported)
+    CONTACTS_IMPORT_BATCH_SIZE: int = 1000
+    CONTACTS_IMPORT_MAX_ERRORS: int = 1000
+    CONTACTS_IMPORT_MAX_BYTES: int = 20 * 1024 * 1024
+
+    # Max operations per POST /api/contacts/batch and ids per multi-get
+    CONTACTS_BATCH_MAX_SIZE: int = 100
+
+    # Email configuration for sending emails. With MAIL_ENABLED=false this process
+    # sends nothing (emails are still queued in the outbox for a worker that has
+    # mail enabled) and the MAIL_* settings below may be left out.
+    MAIL_ENABLED: bool = True
+    MAIL_USERNAME: Optional[EmailStr] = None
+    MAIL_PASSWORD: Optional[str] = None
+    MAIL_FROM: Optional[EmailStr] = None
+    MAIL_PORT: Optional[int] = None
+    MAIL_SERVER: Optional[str] = None
     MAIL_FROM_NAME: str = "Dina Rest API Service"
     MAIL_STARTTLS: bool = False
     MAIL_SSL_TLS: bool = True
     USE_CREDENTIALS: bool = True
     VALIDATE_CERTS: bool = True
 
-    # Cloudinary configuration to store images
-    CLOUDINARY_NAME: str
-    CLOUDINARY_API_KEY: int
-    CLOUDINARY_API_SECRET: str
+    # Email outbox: queued messages are sent by a worker over one persistent SMTP
+    # connection. EMAIL_OUTBOX_WORKER runs it inside the web app, disable it when
+    # the worker is started on its own (python -m app.services.email.outbox_worker).
+    # Failed sends are retried after EMAIL_OUTBOX_BACKOFF_SECONDS, doubled per attempt.
+    EMAIL_OUTBOX_WORKER: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30
+    EMAIL_OUTBOX_MAX_BACKOFF_SECONDS: float = 3600
+
+    # Cloudinary configuration to store images (required for AVATAR_STORAGE=cloudinary)
+    CLOUDINARY_NAME: Optional[str] = None
+    CLOUDINARY_API_KEY: Optional[int] = None
+    CLOUDINARY_API_SECRET: Optional[str] = None
+
+    # Avatars: "cloudinary" or "local" storage (files in AVATAR_LOCAL_DIR, served
+    # by the app under AVATAR_LOCAL_URL), upload size limit, thumbnail size, and
+    # the pools resizing (processes) and storing (threads) them
+    AVATAR_STORAGE: str = "cloudinary"
+    AVATAR_LOCAL_DIR: str = str(Path(__file__).parent.parent / "media")
+    AVATAR_LOCAL_URL: str = "/media"
+    AVATAR_MAX_BYTES: int = 5 * 1024 * 1024
+    AVATAR_SIZE: int = 250
+    AVATAR_RESIZE_PROCESSES: int = 1
+    AVATAR_UPLOAD_THREADS: int = 4
+
+    # Startup: STARTUP_PREWARM opens database connections (STARTUP_PREWARM_CONNECTIONS
+    # per engine, the pool size by default) and starts the bcrypt and resize
+    # processes before the first request; turn it off for the fastest worker boot
+    STARTUP_PREWARM: bool = True
+    STARTUP_PREWARM_CONNECTIONS: Optional[int] = None
 
     # PostgreSQL configuration for Docker
     POSTGRES_USER: str
@@ -44,5 +130,48 @@ class Settings(BaseSettings):
     class Config:
         env_file = str(Path(__file__).parent.parent / ".env")
 
+    @model_validator(mode="after")
+    def check_integrations(self) -> "Settings":
+        # The mail and cloud settings are only required by the enabled integrations
+        required = []
+        if self.MAIL_ENABLED:
+            required += [
+                "MAIL_USERNAME",
+                "MAIL_PASSWORD",
+                "MAIL_FROM",
+                "MAIL_PORT",
+                "MAIL_SERVER",
+            ]
+        if self.AVATAR_STORAGE == "cloudinary":
+            required += [
+                "CLOUDINARY_NAME",
+                "CLOUDINARY_API_KEY",
+                "CLOUDINARY_API_SECRET",
+            ]
+        missing = [name for name in required if getattr(self, name) is None]
+        if missing:
+            raise ValueError(
+                f"Missing settings: {', '.join(missing)}. Set MAIL_ENABLED=false or "
+                "AVATAR_STORAGE=local to run without the mail or cloud integration"
+            )
+        return self
+
+    @property
+    def async_database_url(self) -> str:
+        return self.ASYNC_DATABASE_URL or as_asyncpg_url(self.DATABASE_URL)
+
+    @property
+    def async_read_replica_url(self) -> Optional[str]:
+        if self.ASYNC_READ_REPLICA_URL or not self.READ_REPLICA_URL:
+            return self.ASYNC_READ_REPLICA_URL
+        return as_asyncpg_url(self.READ_REPLICA_URL)
+
+
+def as_asyncpg_url(url: str) -> str:
+    scheme, _, rest = url.partition("://")
+    if scheme.split("+")[0] in ("postgresql", "postgres"):
+        return f"postgresql+asyncpg://{rest}"
+    return url
+
 
 settings = Settings()
@@ -0,0 +1,68 @@
+"""Login password checks per second against the bcrypt cost factor.
+
+For each cost, verifies a burst of passwords the way the login handler used
+to (inline, one verify per request thread) and through the PasswordHasher
+process pool the handlers now await. No database or settings are needed.
+
+    cd src && python -m benchmarks.bcrypt_login_throughput --rounds 10 11 12 13
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.services.auth.password_hasher import (
+    PasswordHasher,
+    hash_password,
+    verify_password,
+)
+
+
+def inline(hashed: str, logins: int, threads: int) -> float:
+    # Starlette's default threadpool has 40 threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(verify_password, ["secret"] * logins, [hashed] * logins))
+    return logins / (time.perf_counter() - started)
+
+
+async def pooled(hasher: PasswordHasher, hashed: str, logins: int) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(hasher.verify("secret", hashed) for _ in range(logins)))
+    return logins / (time.perf_counter() - started)
+
+
+async def run(args):
+    hasher = PasswordHasher(
+        rounds=12, processes=args.processes, max_concurrency=args.processes
+    )
+    # Start the worker processes outside of the measurements
+    await pooled(hasher, hash_password("secret", 4), args.processes)
+
+    print(f"{args.processes} processes, {args.logins} logins per run")
+    print(f"{'rounds':>6} {'verify ms':>10} {'inline/s':>9} {'pool/s':>9}")
+    for rounds in args.rounds:
+        hashed = hash_password("secret", rounds)
+        started = time.perf_counter()
+        verify_password("secret", hashed)
+        latency = (time.perf_counter() - started) * 1000
+        print(
+            f"{rounds:>6} {latency:>10.1f} "
+            f"{inline(hashed, args.logins, args.threads):>9.1f} "
+            f"{await pooled(hasher, hashed, args.logins):>9.1f}"
+        )
+    hasher.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12, 13])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--threads", type=int, default=40)
+    parser.add_argument("--processes", type=int, default=os.cpu_count())
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
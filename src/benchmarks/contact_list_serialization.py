@@ -0,0 +1,112 @@
+"""Time to turn a page of contacts into the JSON response body.
+
+Compares the way list responses used to be built (ORM objects validated
+against ContactPage by FastAPI's response_model, then rendered by
+JSONResponse) with the projection path the list routes now use (row tuples
+turned into dicts and rendered by orjson). Everything runs in memory, no
+database or settings are needed.
+
+    cd src && python -m benchmarks.contact_list_serialization --contacts 1000
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from app.repositories.contacts import projection
+from app.repositories.contacts.queries import CHILD_COLUMNS
+from app.routers.contacts.schemas import ContactPage
+from db.models.contact import AdditionalData, Contact, Email, Phone
+
+
+def orm_contacts(count: int):
+    contacts = []
+    for i in range(1, count + 1):
+        contacts.append(
+            Contact(
+                id=i,
+                first_name=f"First{i}",
+                last_name=f"Last{i}",
+                birthday=date(1970, 1, 1) + timedelta(days=i),
+                emails=[
+                    Email(id=2 * i, email=f"a{i}@example.com", contact_id=i),
+                    Email(id=2 * i + 1, email=f"b{i}@example.com", contact_id=i),
+                ],
+                phones=[Phone(id=i, phone=f"+380{i:09d}", contact_id=i)],
+                additional_data=[AdditionalData(id=i, key="source", value="import")],
+            )
+        )
+    return contacts
+
+
+def rows(contacts):
+    # The tuples the projection queries return for the same contacts
+    Row = namedtuple("Row", projection.CONTACT_FIELDS)
+    contact_rows = [Row(*(getattr(c, f) for f in Row._fields)) for c in contacts]
+    child_rows = {}
+    for collection, columns in CHILD_COLUMNS.items():
+        child_rows[collection] = [
+            (c.id, *(getattr(child, column.key) for column in columns))
+            for c in contacts
+            for child in getattr(c, collection)
+        ]
+    return contact_rows, child_rows
+
+
+def validated(field, contacts) -> bytes:
+    content = asyncio.run(
+        serialize_response(
+            field=field, response_content={"items": contacts, "next_cursor": None}
+        )
+    )
+    return JSONResponse(content).body
+
+
+def projected(contact_rows, child_rows) -> bytes:
+    children = {
+        collection: projection.group_children(collection, child_rows[collection])
+        for collection in projection.COLLECTIONS
+    }
+    items = projection.contact_dicts(contact_rows, children)
+    return ORJSONResponse({"items": items, "next_cursor": None}).body
+
+
+def measure(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    contacts = orm_contacts(args.contacts)
+    contact_rows, child_rows = rows(contacts)
+    field = create_model_field("Response_read_contacts", ContactPage)
+
+    old, new = validated(field, contacts), projected(contact_rows, child_rows)
+    # Both paths must produce the same document
+    assert json.loads(old) == json.loads(new)
+    print(f"response body: {len(old)} bytes before, {len(new)} bytes now")
+
+    before = measure(lambda: validated(field, contacts), args.repeat)
+    after = measure(lambda: projected(contact_rows, child_rows), args.repeat)
+    print(f"{args.contacts} contacts, median of {args.repeat} runs")
+    print(f"response_model + JSONResponse {before:8.2f} ms")
+    print(f"projection + orjson           {after:8.2f} ms ({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
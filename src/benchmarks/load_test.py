@@ -0,0 +1,357 @@
+"""Load test of the API: requests per second and latency percentiles per endpoint.
+
+Virtual users register, confirm their email, log in and create a few contacts,
+then run a weighted mix of scenarios (list, search, birthdays, update, login)
+until the duration is over. Results are written as JSON so runs on different
+commits can be compared. It needs a running app and its database, and the
+app's .env, which is used to mint the email confirmation tokens.
+
+    cd src && uvicorn app.main:app --workers 4
+    cd src && python -m benchmarks.load_test run --users 50 --duration 60 --out before.json
+    cd src && python -m benchmarks.load_test compare before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+from collections import Counter, defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+DEFAULT_MIX = "list=10,search=5,birthdays=2,update=3,login=1"
+FIRST_NAMES = ["Anna", "Bohdan", "Daria", "Ivan", "Kateryna", "Maksym", "Olena"]
+LAST_NAMES = ["Bondar", "Kovalenko", "Melnyk", "Shevchenko", "Tkachenko"]
+PASSWORD = "load-test-password"
+
+
+class Stats:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    def add(self, endpoint: str, status: str, latency_ms: float) -> None:
+        self.latencies[endpoint].append(latency_ms)
+        self.statuses[endpoint][status] += 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {
+            endpoint: summarize(latencies, self.statuses[endpoint], elapsed)
+            for endpoint, latencies in sorted(self.latencies.items())
+        }
+        everything = [ms for latencies in self.latencies.values() for ms in latencies]
+        statuses = sum(self.statuses.values(), Counter())
+        return {
+            "elapsed_s": round(elapsed, 3),
+            "endpoints": endpoints,
+            "total": summarize(everything, statuses, elapsed),
+        }
+
+
+def percentile(values: List[float], p: float) -> float:
+    # Nearest rank on sorted values
+    if not values:
+        return 0.0
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def summarize(latencies: List[float], statuses: Counter, elapsed: float) -> dict:
+    latencies = sorted(latencies)
+    errors = sum(n for status, n in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+    }
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, run_id: str, index: int, seed: int):
+        self.client = client
+        self.index = index
+        self.rng = random.Random(seed * 100_003 + index)
+        self.username = f"load-{run_id}-{index}"
+        self.email = f"{self.username}@example.com"
+        self.headers: Dict[str, str] = {}
+        self.contact_ids: List[int] = []
+        self.counter = 0
+        self.stats: Optional[Stats] = None
+
+    async def call(self, endpoint: str, method: str, url: str, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+            status = str(response.status_code)
+        except httpx.HTTPError as err:
+            response, status = None, type(err).__name__
+        if self.stats is not None:
+            self.stats.add(endpoint, status, (time.perf_counter() - started) * 1000)
+        return response
+
+    def unique(self) -> str:
+        self.counter += 1
+        return f"{self.username}-{self.counter}"
+
+    def new_contact(self) -> dict:
+        unique = self.unique()
+        birthday = date(1970, 1, 1) + timedelta(days=self.rng.randrange(365 * 40))
+        return {
+            "first_name": self.rng.choice(FIRST_NAMES),
+            "last_name": self.rng.choice(LAST_NAMES),
+            "birthday": birthday.isoformat(),
+            "emails": [{"email": f"{unique}@example.com"}],
+            "phones": [{"phone": unique}],
+            "additional_data": [{"key": "source", "value": "load-test"}],
+        }
+
+    async def setup(self, stats: Stats, contacts: int) -> None:
+        from app.services.auth.jwt_manager import JWTManager
+
+        self.stats = stats
+        await self.call(
+            "register",
+            "POST",
+            "/api/auth/register",
+            json={
+                "username": self.username,
+                "password": PASSWORD,
+                "email": self.email,
+            },
+        )
+        token = JWTManager().create_email_token({"sub": self.email})
+        await self.call("confirm", "GET", f"/api/users/confirmed_email/{token}")
+        await self.login()
+        for _ in range(contacts):
+            response = await self.call(
+                "create",
+                "POST",
+                "/api/contacts/",
+                json=self.new_contact(),
+                headers=self.headers,
+            )
+            if response is not None and response.status_code == 201:
+                self.contact_ids.append(response.json()["id"])
+
+    async def login(self) -> None:
+        response = await self.call(
+            "login",
+            "POST",
+            "/api/auth/login",
+            data={"username": self.username, "password": PASSWORD},
+        )
+        if response is not None and response.status_code == 200:
+            token = response.json()["access_token"]
+            self.headers = {"Authorization": f"Bearer {token}"}
+
+    async def list_contacts(self) -> None:
+        await self.call(
+            "list", "GET", "/api/contacts/", params={"limit": 20}, headers=self.headers
+        )
+
+    async def search_contacts(self) -> None:
+        await self.call(
+            "search",
+            "GET",
+            "/api/contacts/search/",
+            params={"q": self.rng.choice(FIRST_NAMES + LAST_NAMES), "limit": 20},
+            headers=self.headers,
+        )
+
+    async def upcoming_birthdays(self) -> None:
+        await self.call(
+            "birthdays",
+            "GET",
+            "/api/contacts/birthdays/",
+            params={"days": 30},
+            headers=self.headers,
+        )
+
+    async def update_contact(self) -> None:
+        if not self.contact_ids:
+            return
+        await self.call(
+            "update",
+            "PUT",
+            f"/api/contacts/{self.rng.choice(self.contact_ids)}",
+            json={
+                "last_name": self.rng.choice(LAST_NAMES),
+                "phones": [{"phone": self.unique()}],
+            },
+            headers=self.headers,
+        )
+
+    async def run(self, scenarios: List[str], weights: List[int], deadline: float):
+        while time.perf_counter() < deadline:
+            scenario = self.rng.choices(scenarios, weights)[0]
+            await SCENARIOS[scenario](self)
+
+
+SCENARIOS = {
+    "list": VirtualUser.list_contacts,
+    "search": VirtualUser.search_contacts,
+    "birthdays": VirtualUser.upcoming_birthdays,
+    "update": VirtualUser.update_contact,
+    "login": VirtualUser.login,
+}
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        scenario, _, weight = item.partition("=")
+        if scenario not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {scenario}")
+        mix[scenario] = int(weight or 1)
+    return mix
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    run_id = args.run_id or datetime.now().strftime("%Y%m%d%H%M%S")
+    limits = httpx.Limits(
+        max_connections=args.users, max_keepalive_connections=args.users
+    )
+    async with httpx.AsyncClient(
+        base_url=args.base_url, limits=limits, timeout=args.timeout
+    ) as client:
+        users = [VirtualUser(client, run_id, i, args.seed) for i in range(args.users)]
+
+        setup_stats = Stats()
+        started = time.perf_counter()
+        await asyncio.gather(*(u.setup(setup_stats, args.contacts) for u in users))
+        setup_elapsed = time.perf_counter() - started
+
+        # Samples taken during the warmup are dropped
+        warmup_stats, stats = Stats(), Stats()
+        for user in users:
+            user.stats = warmup_stats
+        scenarios, weights = zip(*args.mix.items())
+        started = time.perf_counter()
+        deadline = started + args.warmup + args.duration
+        tasks = [
+            asyncio.create_task(user.run(list(scenarios), list(weights), deadline))
+            for user in users
+        ]
+        await asyncio.sleep(args.warmup)
+        for user in users:
+            user.stats = stats
+        measured = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - measured
+
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": git_commit(),
+            "base_url": args.base_url,
+            "users": args.users,
+            "contacts_per_user": args.contacts,
+            "warmup_s": args.warmup,
+            "duration_s": args.duration,
+            "mix": args.mix,
+            "seed": args.seed,
+            "python": platform.python_version(),
+        },
+        "setup": setup_stats.report(setup_elapsed),
+        "steady": stats.report(elapsed),
+    }
+
+
+def print_report(result: dict) -> None:
+    for phase in ("setup", "steady"):
+        report = result[phase]
+        print(f"{phase} ({report['elapsed_s']:.1f}s)")
+        print(
+            f"{'endpoint':<10} {'requests':>8} {'errors':>6} {'rps':>8} "
+            f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        )
+        rows = list(report["endpoints"].items()) + [("total", report["total"])]
+        for endpoint, s in rows:
+            print(
+                f"{endpoint:<10} {s['requests']:>8} {s['errors']:>6} {s['rps']:>8.1f} "
+                f"{s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} {s['p99_ms']:>8.1f}"
+            )
+
+
+def compare(before: dict, after: dict) -> None:
+    def change(old: float, new: float) -> str:
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{before['meta'].get('commit')} -> {after['meta'].get('commit')} (steady)")
+    print(
+        f"{'endpoint':<10} {'rps':>18} {'change':>8} {'p95 ms':>18} {'change':>8} "
+        f"{'p99 ms':>18} {'change':>8}"
+    )
+    old_endpoints = dict(before["steady"]["endpoints"], total=before["steady"]["total"])
+    new_endpoints = dict(after["steady"]["endpoints"], total=after["steady"]["total"])
+    for endpoint, new in new_endpoints.items():
+        old = old_endpoints.get(endpoint)
+        if old is None:
+            continue
+        columns = []
+        for key in ("rps", "p95_ms", "p99_ms"):
+            pair = f"{old[key]:.1f} -> {new[key]:.1f}"
+            columns.append(f"{pair:>18} {change(old[key], new[key]):>8}")
+        print(f"{endpoint:<10} " + " ".join(columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the load test")
+    run_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    run_parser.add_argument("--users", type=int, default=20)
+    run_parser.add_argument("--contacts", type=int, default=20, help="per user")
+    run_parser.add_argument("--warmup", type=float, default=5)
+    run_parser.add_argument("--duration", type=float, default=30)
+    run_parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX))
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--timeout", type=float, default=30)
+    run_parser.add_argument(
+        "--run-id", help="suffix of the usernames, a timestamp by default"
+    )
+    run_parser.add_argument("--out", help="write the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("before")
+    compare_parser.add_argument("after")
+
+    args = parser.parse_args()
+    if args.command == "compare":
+        with open(args.before) as before, open(args.after) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    result = asyncio.run(run(args))
+    print_report(result)
+    if args.out:
+        with open(args.out, "w") as out:
+            json.dump(result, out, indent=2)
+        print(f"results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Cold start of the app: time to import app.main and where it goes.
+
+Imports app.main in fresh interpreters and reports the median import time,
+then runs it once more under python -X importtime to break the time down by
+top-level package. --env overrides settings for the child processes, e.g. to
+compare a worker booting with the mail and cloud integrations disabled.
+--lifespan also runs the app startup (the prewarm), which needs the database.
+Settings come from the environment and src/.env as for the app.
+
+    cd src && python -m benchmarks.startup_time --repeat 10
+    cd src && python -m benchmarks.startup_time --env MAIL_ENABLED=false --env AVATAR_STORAGE=local
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from collections import Counter
+from typing import Dict, List
+
+IMPORT_APP = """
+import time
+started = time.perf_counter()
+import app.main
+print(time.perf_counter() - started)
+"""
+
+START_APP = """
+import asyncio, time
+started = time.perf_counter()
+from app.main import app
+
+async def start():
+    async with app.router.lifespan_context(app):
+        print(time.perf_counter() - started)
+
+asyncio.run(start())
+"""
+
+
+def run_child(code: str, env: Dict[str, str], importtime: bool = False):
+    command = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c"]
+    result = subprocess.run(
+        [*command, code], env=env, capture_output=True, text=True, check=False
+    )
+    if result.returncode != 0:
+        sys.exit(f"The app failed to start:\n{result.stderr[-2000:]}")
+    return float(result.stdout.strip().splitlines()[-1]) * 1000, result.stderr
+
+
+def import_times(stderr: str) -> Counter:
+    # Self time of every module, summed per top-level package, in ms
+    packages = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        if self_us.strip().isdigit():
+            packages[name.strip().split(".")[0]] += int(self_us) / 1000
+    return packages
+
+
+def parse_env(values: List[str]) -> Dict[str, str]:
+    env = {}
+    for value in values:
+        key, sep, setting = value.partition("=")
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected KEY=VALUE: {value}")
+        env[key] = setting
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="packages to list")
+    parser.add_argument("--env", action="append", default=[], help="KEY=VALUE")
+    parser.add_argument(
+        "--lifespan", action="store_true", help="include the app startup"
+    )
+    args = parser.parse_args()
+
+    env = dict(os.environ, **parse_env(args.env))
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [os.getcwd(), env.get("PYTHONPATH")])
+    )
+    code = START_APP if args.lifespan else IMPORT_APP
+
+    timings = [run_child(code, env)[0] for _ in range(args.repeat)]
+    _, stderr = run_child(IMPORT_APP, env, importtime=True)
+    packages = import_times(stderr)
+
+    phase = "import + startup" if args.lifespan else "import app.main"
+    print(f"{phase}: median {statistics.median(timings):.0f} ms", end=" ")
+    print(f"(min {min(timings):.0f}, max {max(timings):.0f}, {args.repeat} runs)")
+    print(f"\nimport time by package (-X importtime, {sum(packages.values()):.0f} ms)")
+    for package, ms in packages.most_common(args.top):
+        print(f"{package:<24} {ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
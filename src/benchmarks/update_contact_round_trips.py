@@ -0,0 +1,136 @@
+"""Counts database round trips per contact update.
+
+Runs the same PUT payloads through the previous clear-and-reinsert update and
+through ContactsRepository.update_contact against DATABASE_URL, counting every
+statement sent to the server and every COMMIT. The rows it creates are removed
+afterwards.
+
+    cd src && python -m benchmarks.update_contact_round_trips --updates 50
+"""
+
+import argparse
+import uuid
+from sqlalchemy import event
+from app.repositories.contacts import queries
+from app.repositories.contacts.crud import ContactsRepository
+from app.routers.contacts import schemas
+from db.database import engine, SessionLocal
+from db.models import User
+from db.models.contact import Email, Phone, AdditionalData
+
+
+class RoundTrips:
+    def __init__(self):
+        self.statements = 0
+        self.commits = 0
+        event.listen(engine, "before_cursor_execute", self._on_statement)
+        event.listen(engine, "commit", self._on_commit)
+
+    def _on_statement(self, *args):
+        self.statements += 1
+
+    def _on_commit(self, *args):
+        self.commits += 1
+
+    def reset(self):
+        self.statements = self.commits = 0
+
+
+def legacy_update_contact(db, contact_id, contact, user_id):
+    # update_contact as it was before the diff-based rewrite
+    db_contact = db.scalars(queries.select_contact(contact_id, user_id)).first()
+    if db_contact:
+        for key, value in contact.model_dump(exclude_unset=True).items():
+            if key not in ["emails", "phones", "additional_data"]:
+                setattr(db_contact, key, value)
+        if contact.emails:
+            db_contact.emails.clear()
+            db.commit()
+            db_contact.emails.extend([Email(email=e.email) for e in contact.emails])
+        if contact.phones:
+            db_contact.phones.clear()
+            db.commit()
+            db_contact.phones.extend([Phone(phone=p.phone) for p in contact.phones])
+        if contact.additional_data:
+            db_contact.additional_data.clear()
+            db.commit()
+            db_contact.additional_data.extend(
+                [
+                    AdditionalData(key=d.key, value=d.value)
+                    for d in contact.additional_data
+                ]
+            )
+        db_contact.refresh_search_text()
+        db.commit()
+        db.refresh(db_contact)
+    return db_contact
+
+
+def payloads(tag, i):
+    base = {
+        "first_name": "Bench",
+        "last_name": f"Contact {tag}",
+        "birthday": "1990-05-17",
+        "emails": [{"email": f"{tag}-a@bench.example.com"}],
+        "phones": [{"phone": f"+1555{tag}01"}, {"phone": f"+1555{tag}02"}],
+        "additional_data": [{"key": "company", "value": "ACME"}],
+    }
+    one_email = dict(base, emails=[{"email": f"{tag}-{i}@bench.example.com"}])
+    everything = dict(
+        base,
+        first_name=f"Bench {i}",
+        emails=[{"email": f"{tag}-{i}-x@bench.example.com"}],
+        phones=[{"phone": f"+1555{tag}{i:04d}"}],
+        additional_data=[{"key": "company", "value": f"ACME {i}"}],
+    )
+    return {"unchanged": base, "one email": one_email, "everything": everything}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20)
+    args = parser.parse_args()
+
+    counter = RoundTrips()
+    repository = ContactsRepository()
+    db = SessionLocal()
+    user = User(
+        username=f"bench-{uuid.uuid4().hex[:8]}",
+        password="-",
+        email=f"{uuid.uuid4().hex[:8]}@bench.example.com",
+    )
+    db.add(user)
+    db.commit()
+    try:
+        implementations = {
+            "before": legacy_update_contact,
+            "after": repository.update_contact,
+        }
+        print(f"{'scenario':<12} {'impl':<7} {'statements':>11} {'commits':>8}")
+        for scenario in ["unchanged", "one email", "everything"]:
+            for name, update in implementations.items():
+                tag = uuid.uuid4().hex[:6]
+                initial = schemas.ContactCreate(**payloads(tag, 0)["unchanged"])
+                contact_id = repository.create_contact(db, initial, user.id).id
+                counter.reset()
+                for i in range(1, args.updates + 1):
+                    data = schemas.ContactCreate(**payloads(tag, i)[scenario])
+                    db_contact = update(db, contact_id, data, user.id)
+                    # Serializing the response may lazy-load expired children
+                    schemas.Contact.model_validate(db_contact)
+                    # Ends the request's transaction, counted for both
+                    db.commit()
+                print(
+                    f"{scenario:<12} {name:<7} "
+                    f"{counter.statements / args.updates:>11.1f} "
+                    f"{counter.commits / args.updates:>8.1f}"
+                )
+    finally:
+        db.rollback()
+        db.delete(db.get(User, user.id))
+        db.commit()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
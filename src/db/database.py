@@ -1,11 +1,76 @@
 import os
 from sqlalchemy import create_engine, MetaData
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from app.settings import settings
+from app.helpers.metrics.db import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    instrument_engine,
+)
 
-engine = create_engine(settings.DATABASE_URL)
+
+def pool_options(name: str) -> dict:
+    # The pools time how long checkouts wait, labelled with pool_logging_name
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_logging_name": name,
+    }
+
+
+engine = create_engine(
+    settings.DATABASE_URL, poolclass=TimedQueuePool, **pool_options("primary")
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Contact reads go to the replica when there is one, see app/helpers/api/read_routing.py
+if settings.READ_REPLICA_URL:
+    replica_engine = create_engine(
+        settings.READ_REPLICA_URL, poolclass=TimedQueuePool, **pool_options("replica")
+    )
+    ReplicaSessionLocal = sessionmaker(
+        autocommit=False, autoflush=False, bind=replica_engine
+    )
+else:
+    replica_engine = None
+    ReplicaSessionLocal = None
+
+# The async engines are only built when enabled, so the asyncpg driver stays optional
+async_engine = AsyncSessionLocal = None
+async_replica_engine = AsyncReplicaSessionLocal = None
+if settings.DB_ASYNC:
+    async_engine = create_async_engine(
+        settings.async_database_url,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        **pool_options("async"),
+    )
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine, autoflush=False, expire_on_commit=False
+    )
+    if settings.async_read_replica_url:
+        async_replica_engine = create_async_engine(
+            settings.async_read_replica_url,
+            poolclass=TimedAsyncAdaptedQueuePool,
+            **pool_options("async-replica"),
+        )
+        AsyncReplicaSessionLocal = async_sessionmaker(
+            bind=async_replica_engine, autoflush=False, expire_on_commit=False
+        )
+
+if settings.METRICS_ENABLED:
+    for name, instrumented in [
+        ("primary", engine),
+        ("replica", replica_engine),
+        ("async", async_engine),
+        ("async-replica", async_replica_engine),
+    ]:
+        if instrumented is not None:
+            instrument_engine(instrumented, name)
+
 
 # metadata = MetaData()
 
@@ -16,3 +81,10 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("Async database access is disabled, set DB_ASYNC=true")
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,2 +1,4 @@
 from db.models.user import User
 from db.models.contact import Contact, Email, Phone, AdditionalData
+from db.models.email_outbox import EmailOutbox
+from db.models.contact_stats import ContactStats
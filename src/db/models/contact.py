@@ -1,6 +1,36 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Date, Text
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Column,
+    Computed,
+    Integer,
+    SmallInteger,
+    String,
+    ForeignKey,
+    Date,
+    Text,
+    Index,
+    func,
+)
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from db.models.base import Base
+from typing import Iterable, Optional
+import re
+
+
+def build_search_text(
+    first_name: str,
+    last_name: str,
+    emails: Iterable[str] = (),
+    phones: Iterable[str] = (),
+    values: Iterable[Optional[str]] = (),
+) -> str:
+    # Denormalized text of everything searchable in a contact; phones are added
+    # both as entered and as bare digits so "050 123" and "050123" both match
+    parts = [first_name, last_name, *emails]
+    for phone in phones:
+        parts += [phone, re.sub(r"\D", "", phone)]
+    parts += values
+    return " ".join(part for part in parts if part)
 
 
 class Contact(Base):
@@ -10,9 +40,26 @@ class Contact(Base):
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     birthday = Column(Date, nullable=True)
+    # month * 100 + day of the birthday, indexed for upcoming birthday lookups
+    birthday_key = Column(
+        SmallInteger,
+        Computed(
+            "CAST(EXTRACT(MONTH FROM birthday) * 100"
+            " + EXTRACT(DAY FROM birthday) AS SMALLINT)",
+            persisted=True,
+        ),
+    )
     user_id = Column(
         Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False
     )  # Foreign key to User table
+    # Maintained by the repository from the contact and its children; deferred
+    # since they are only used inside search queries
+    search_text = deferred(Column(Text, nullable=False, server_default=""))
+    search_vector = deferred(
+        Column(TSVECTOR, Computed("to_tsvector('simple', search_text)", persisted=True))
+    )
+    # Bumped on every change to the contact or its children, backs the ETag
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     emails = relationship(
         "Email", back_populates="contact", cascade="all, delete-orphan"
@@ -27,6 +74,44 @@ class Contact(Base):
     # Relationship with User
     user = relationship("User", back_populates="contacts")
 
+    # Composite indexes backing the keyset orderings of contact pages
+    __table_args__ = (
+        Index(
+            "ix_contacts_user_id_last_name", "user_id", "last_name", "first_name", "id"
+        ),
+        Index(
+            "ix_contacts_user_id_first_name", "user_id", "first_name", "last_name", "id"
+        ),
+        Index("ix_contacts_user_id_id", "user_id", "id"),
+        Index("ix_contacts_user_id_birthday_key", "user_id", "birthday_key"),
+        # Case-insensitive name search within a user's book
+        Index("ix_contacts_user_id_lower_first_name", user_id, func.lower(first_name)),
+        Index("ix_contacts_user_id_lower_last_name", user_id, func.lower(last_name)),
+        # Free-text and fuzzy search, (user_id, ...) GIN indexes need btree_gin
+        Index(
+            "ix_contacts_user_id_search_vector",
+            "user_id",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        Index(
+            "ix_contacts_user_id_search_text_trgm",
+            "user_id",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
+
+    def refresh_search_text(self) -> None:
+        self.search_text = build_search_text(
+            self.first_name,
+            self.last_name,
+            [email.email for email in self.emails],
+            [phone.phone for phone in self.phones],
+            [data.value for data in self.additional_data],
+        )
+
 
 class Email(Base):
     __tablename__ = "emails"
@@ -40,6 +125,8 @@ class Email(Base):
 
     contact = relationship("Contact", back_populates="emails")
 
+    __table_args__ = (Index("ix_emails_lower_email", func.lower(email)),)
+
 
 class Phone(Base):
     __tablename__ = "phones"
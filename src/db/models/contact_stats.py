@@ -0,0 +1,19 @@
+from db.models.base import Base
+from sqlalchemy import Column, ForeignKey, Integer, SmallInteger
+
+
+class ContactStats(Base):
+    __tablename__ = "contact_stats"
+
+    # Counters of a user's contacts, one row per birthday month (0 for contacts
+    # without a birthday): a contact write changes at most two rows and the
+    # book totals are the sum of at most 13. Kept in step by the contacts
+    # repositories in the writing transaction, rebuilt by
+    # app/services/contacts/reconcile_stats.py
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    birth_month = Column(SmallInteger, primary_key=True)
+    contacts = Column(Integer, nullable=False, default=0, server_default="0")
+    without_email = Column(Integer, nullable=False, default=0, server_default="0")
+    without_phone = Column(Integer, nullable=False, default=0, server_default="0")
@@ -0,0 +1,34 @@
+from datetime import datetime, UTC
+from db.models.base import Base
+from sqlalchemy import JSON, Column, DateTime, Index, Integer, String, Text, text
+
+
+def utcnow() -> datetime:
+    # Naive UTC, matching the timestamp columns of the table
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    template = Column(String(100), nullable=False)  # Key of the renderer to use
+    context = Column(JSON, nullable=False, default=dict)
+    # pending -> sending (claimed by a worker) -> sent | failed
+    status = Column(String(20), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=utcnow)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=utcnow)
+    sent_at = Column(DateTime, nullable=True)
+
+    # Only undelivered messages are scanned by the worker
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_next_attempt_at",
+            "next_attempt_at",
+            postgresql_where=text("status IN ('pending', 'sending')"),
+        ),
+    )
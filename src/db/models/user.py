@@ -1,6 +1,6 @@
 from db.models.base import Base
 from sqlalchemy.orm import relationship
-from sqlalchemy import Column, DateTime, Integer, String, Boolean, func
+from sqlalchemy import Column, DateTime, Integer, String, Boolean, Index, func
 
 
 class User(Base):
@@ -11,10 +11,20 @@ class User(Base):
     password = Column(String(255), nullable=False)
     email = Column(String(255), nullable=False, unique=True)
     avatar = Column(String(255), nullable=True)
+    # SHA-256 of the uploaded image the avatar was made from
+    avatar_hash = Column(String(64), nullable=True)
     created_at = Column(DateTime, default=func.now())
     confirmed = Column(Boolean, default=False)
+    # Bumped on every write to the user's contacts, backs the contact list ETag
+    contacts_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     # Relationship with Contact
     contacts = relationship(
         "Contact", back_populates="user", cascade="all, delete-orphan"
     )
+
+    # Expression indexes serving the case-insensitive lookups in UsersRepository
+    __table_args__ = (
+        Index("ix_users_lower_username", func.lower(username)),
+        Index("ix_users_lower_email", func.lower(email)),
+    )
@@ -0,0 +1,407 @@
+"""Fill the database with synthetic users and contacts for capacity testing.
+
+Users are generated in chunks, each loaded by a worker process in one
+transaction with Postgres COPY. A chunk's data only depends on the seed and
+the chunk number, so the same seed gives the same dataset whatever the number
+of workers. Run it against an otherwise idle database: ids are reserved in
+blocks straight from the table sequences.
+
+    cd src && python -m db.seed --users 100000 --contacts exponential:100 --workers 8
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from faker import Faker
+
+# Serializes the id reservations of concurrent chunks
+ID_LOCK = 7_340_019
+POOL_SIZE = 5000
+ADDITIONAL_KEYS = ["company", "job", "city", "note", "website"]
+TABLES = ("users", "contacts", "emails", "phones", "additional_data")
+# Users sign up at random moments of the two years that follow
+SIGNUPS_FROM = datetime(2024, 1, 1)
+
+
+@dataclass(frozen=True)
+class Distribution:
+    kind: str
+    params: Tuple[float, ...]
+
+    def sample(self, rng: random.Random) -> int:
+        if self.kind == "fixed":
+            return int(self.params[0])
+        if self.kind == "uniform":
+            return rng.randint(int(self.params[0]), int(self.params[1]))
+        # exponential: long tail around the mean, like real address books
+        return int(rng.expovariate(1 / self.params[0])) if self.params[0] else 0
+
+
+def parse_distribution(value: str) -> Distribution:
+    # fixed:N, uniform:MIN:MAX or exponential:MEAN
+    kind, *params = value.split(":")
+    arity = {"fixed": 1, "uniform": 2, "exponential": 1}
+    try:
+        numbers = tuple(float(p) for p in params)
+    except ValueError:
+        numbers = ()
+    if kind not in arity or len(numbers) != arity[kind] or min(numbers) < 0:
+        raise argparse.ArgumentTypeError(
+            f"Expected fixed:N, uniform:MIN:MAX or exponential:MEAN, got {value!r}"
+        )
+    return Distribution(kind, numbers)
+
+
+@dataclass(frozen=True)
+class SeedConfig:
+    seed: int
+    users: int
+    chunk_size: int
+    contacts: Distribution
+    emails: Distribution
+    phones: Distribution
+    additional_data: Distribution
+    birthday_rate: float
+    password_hash: str
+    locale: str
+
+
+class Pools:
+    # Faker is slow per call, so each worker draws its values once from a
+    # Faker seeded with the seed alone and then picks from them
+    def __init__(self, seed: int, locale: str):
+        fake = Faker(locale)
+        fake.seed_instance(seed)
+        self.first_names = [fake.first_name() for _ in range(POOL_SIZE)]
+        self.last_names = [fake.last_name() for _ in range(POOL_SIZE)]
+        self.user_names = [fake.user_name() for _ in range(POOL_SIZE)]
+        self.domains = sorted({fake.free_email_domain() for _ in range(100)})
+        self.values = {
+            "company": [fake.company() for _ in range(POOL_SIZE)],
+            "job": [fake.job() for _ in range(POOL_SIZE)],
+            "city": [fake.city() for _ in range(POOL_SIZE)],
+            "note": [fake.sentence() for _ in range(POOL_SIZE)],
+            "website": [fake.url() for _ in range(POOL_SIZE)],
+        }
+
+
+_pools: Optional[Pools] = None
+
+
+def get_pools(config: SeedConfig) -> Pools:
+    global _pools
+    if _pools is None:
+        _pools = Pools(config.seed, config.locale)
+    return _pools
+
+
+class Chunk:
+    # Rows of one chunk, with ids relative to the chunk until they are reserved
+    def __init__(self):
+        self.rows: Dict[str, List[tuple]] = {table: [] for table in TABLES}
+
+
+def generate_chunk(config: SeedConfig, number: int) -> Chunk:
+    from db.models.contact import build_search_text
+
+    pools = get_pools(config)
+    rng = random.Random(config.seed * 1_000_003 + number)
+    chunk = Chunk()
+    rows = chunk.rows
+    first_user = number * config.chunk_size
+    # Emails and phones are unique across their tables: they carry the seed,
+    # the chunk and this counter
+    counter = 0
+
+    for user in range(first_user, min(first_user + config.chunk_size, config.users)):
+        user_id = len(rows["users"])
+        username = f"{rng.choice(pools.user_names)}.{config.seed}.{user}"
+        rows["users"].append(
+            (
+                user_id,
+                username,
+                config.password_hash,
+                f"{username}@example.com",
+                SIGNUPS_FROM + timedelta(seconds=rng.randrange(2 * 365 * 86400)),
+                True,
+            )
+        )
+        for _ in range(config.contacts.sample(rng)):
+            contact_id = len(rows["contacts"])
+            first_name = rng.choice(pools.first_names)
+            last_name = rng.choice(pools.last_names)
+            birthday = None
+            if rng.random() < config.birthday_rate:
+                birthday = date(1935, 1, 1) + timedelta(days=rng.randrange(365 * 85))
+
+            emails, phones, values = [], [], []
+            for _ in range(config.emails.sample(rng)):
+                counter += 1
+                email = (
+                    f"{rng.choice(pools.user_names)}.{config.seed}.{number}.{counter}"
+                    f"@{rng.choice(pools.domains)}"
+                )
+                emails.append(email)
+                rows["emails"].append((len(rows["emails"]), email, contact_id))
+            for _ in range(config.phones.sample(rng)):
+                counter += 1
+                phone = f"+{config.seed} {number:06d} {counter:07d}"
+                phones.append(phone)
+                rows["phones"].append((len(rows["phones"]), phone, contact_id))
+            for key in rng.sample(
+                ADDITIONAL_KEYS,
+                min(config.additional_data.sample(rng), len(ADDITIONAL_KEYS)),
+            ):
+                value = rng.choice(pools.values[key])
+                values.append(value)
+                rows["additional_data"].append(
+                    (len(rows["additional_data"]), key, value, contact_id)
+                )
+
+            search_text = build_search_text(
+                first_name, last_name, emails, phones, values
+            )
+            rows["contacts"].append(
+                (contact_id, first_name, last_name, birthday, user_id, search_text)
+            )
+    return chunk
+
+
+# Columns written by COPY, the first one is the id and the ones named in
+# REFERENCES point at the table given there. Generated columns are left out.
+COLUMNS = {
+    "users": ("id", "username", "password", "email", "created_at", "confirmed"),
+    "contacts": (
+        "id",
+        "first_name",
+        "last_name",
+        "birthday",
+        "user_id",
+        "search_text",
+    ),
+    "emails": ("id", "email", "contact_id"),
+    "phones": ("id", "phone", "contact_id"),
+    "additional_data": ("id", "key", "value", "contact_id"),
+}
+REFERENCES = {"user_id": "users", "contact_id": "contacts"}
+
+
+def copy_value(value) -> str:
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def copy_rows(
+    cursor, table: str, rows: Iterable[tuple], offsets: Dict[str, int]
+) -> None:
+    columns = COLUMNS[table]
+    # The ids generated relative to the chunk are shifted onto the reserved ones
+    shifts = [
+        offsets[table] if i == 0 else offsets.get(REFERENCES.get(column), 0)
+        for i, column in enumerate(columns)
+    ]
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(
+            "\t".join(
+                copy_value(value + shift if shift else value)
+                for value, shift in zip(row, shifts)
+            )
+        )
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def reserve_ids(cursor, counts: Dict[str, int]) -> Dict[str, int]:
+    # Takes a block of ids per table from its sequence, returns the first ones
+    cursor.execute("SELECT pg_advisory_xact_lock(%s)", (ID_LOCK,))
+    offsets = {}
+    for table, count in counts.items():
+        if count == 0:
+            offsets[table] = 0
+            continue
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, 'id'))", (table,))
+        first = cursor.fetchone()[0]
+        cursor.execute(
+            "SELECT setval(pg_get_serial_sequence(%s, 'id'), %s)",
+            (table, first + count - 1),
+        )
+        offsets[table] = first
+    return offsets
+
+
+def load_chunk(config: SeedConfig, number: int, dry_run: bool) -> Dict[str, int]:
+    chunk = generate_chunk(config, number)
+    counts = {table: len(rows) for table, rows in chunk.rows.items()}
+    if dry_run:
+        return counts
+
+    from db.database import engine
+
+    connection = engine.raw_connection()
+    try:
+        cursor = connection.cursor()
+        # Committed right away so the lock is not held during the load
+        offsets = reserve_ids(cursor, counts)
+        connection.commit()
+        for table in TABLES:
+            if chunk.rows[table]:
+                copy_rows(cursor, table, chunk.rows[table], offsets)
+        connection.commit()
+    finally:
+        connection.close()
+    return counts
+
+
+def deferrable_indexes():
+    # Non-unique indexes of the loaded tables, cheaper to build once at the end
+    import db.models  # noqa: F401 (registers the tables)
+    from db.models.base import metadata
+
+    return [
+        index
+        for table in TABLES
+        for index in metadata.tables[table].indexes
+        if not index.unique
+    ]
+
+
+def seed(
+    config: SeedConfig, workers: int, defer_indexes: bool, dry_run: bool
+) -> Dict[str, int]:
+    from db.database import engine
+
+    chunks = -(-config.users // config.chunk_size)
+    totals = {table: 0 for table in TABLES}
+    indexes = deferrable_indexes() if defer_indexes and not dry_run else []
+    for index in indexes:
+        index.drop(engine, checkfirst=True)
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(load_chunk, config, number, dry_run)
+            for number in range(chunks)
+        ]
+        for done, future in enumerate(as_completed(futures), 1):
+            for table, count in future.result().items():
+                totals[table] += count
+            rows = sum(totals.values())
+            elapsed = time.perf_counter() - started
+            print(
+                f"chunk {done}/{chunks}: {rows} rows, {rows / elapsed:,.0f} rows/s",
+                flush=True,
+            )
+
+    if indexes:
+        print(f"creating {len(indexes)} indexes", flush=True)
+        for index in indexes:
+            index.create(engine)
+    if not dry_run:
+        # COPY skips the repository, so the contact stats are counted afterwards
+        from app.services.contacts.reconcile_stats import reconcile_stats
+
+        print("rebuilding contact stats", flush=True)
+        reconcile_stats(batch_size=config.chunk_size)
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument(
+        "--contacts",
+        type=parse_distribution,
+        default=parse_distribution("uniform:10:100"),
+        help="contacts per user: fixed:N, uniform:MIN:MAX or exponential:MEAN",
+    )
+    parser.add_argument(
+        "--emails",
+        type=parse_distribution,
+        default=parse_distribution("uniform:0:2"),
+        help="emails per contact",
+    )
+    parser.add_argument(
+        "--phones",
+        type=parse_distribution,
+        default=parse_distribution("uniform:1:2"),
+        help="phones per contact",
+    )
+    parser.add_argument(
+        "--additional-data",
+        type=parse_distribution,
+        default=parse_distribution("uniform:0:3"),
+        help="additional data entries per contact",
+    )
+    parser.add_argument(
+        "--birthday-rate",
+        type=float,
+        default=0.8,
+        help="share of contacts with a birthday",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--chunk-size", type=int, default=1000, help="users per chunk")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--locale", default="en_US")
+    parser.add_argument(
+        "--password",
+        default="password",
+        help="password of every generated user",
+    )
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="drop the non-unique indexes during the load and build them after",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="generate the rows without loading them",
+    )
+    args = parser.parse_args()
+
+    from app.services.auth.password_hasher import hash_password
+    from app.settings import settings
+
+    config = SeedConfig(
+        seed=args.seed,
+        users=args.users,
+        chunk_size=args.chunk_size,
+        contacts=args.contacts,
+        emails=args.emails,
+        phones=args.phones,
+        additional_data=args.additional_data,
+        birthday_rate=args.birthday_rate,
+        # Hashed once, every generated user logs in with the same password
+        password_hash=hash_password(args.password, settings.BCRYPT_ROUNDS),
+        locale=args.locale,
+    )
+    started = time.perf_counter()
+    totals = seed(config, args.workers, args.defer_indexes, args.dry_run)
+    elapsed = time.perf_counter() - started
+    print(
+        ", ".join(f"{table}: {count}" for table, count in totals.items())
+        + f" in {elapsed:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
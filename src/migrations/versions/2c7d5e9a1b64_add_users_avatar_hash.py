@@ -0,0 +1,28 @@
+"""add users avatar hash
+
+Revision ID: 2c7d5e9a1b64
+Revises: 9f3b2c8e4a17
+Create Date: 2026-10-18 20:02:11.583104
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "2c7d5e9a1b64"
+down_revision: Union[str, None] = "9f3b2c8e4a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("users", sa.Column("avatar_hash", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "avatar_hash")
@@ -0,0 +1,52 @@
+"""add lower() expression indexes
+
+Revision ID: 3c9e0d2a7f41
+Revises: 696616b135db
+Create Date: 2026-10-18 11:05:47.118230
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "3c9e0d2a7f41"
+down_revision: Union[str, None] = "696616b135db"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_users_lower_username", "users", [sa.text("lower(username)")], unique=False
+    )
+    op.create_index(
+        "ix_users_lower_email", "users", [sa.text("lower(email)")], unique=False
+    )
+    op.create_index(
+        "ix_contacts_user_id_lower_first_name",
+        "contacts",
+        ["user_id", sa.text("lower(first_name)")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_contacts_user_id_lower_last_name",
+        "contacts",
+        ["user_id", sa.text("lower(last_name)")],
+        unique=False,
+    )
+    op.create_index(
+        "ix_emails_lower_email", "emails", [sa.text("lower(email)")], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_emails_lower_email", table_name="emails")
+    op.drop_index("ix_contacts_user_id_lower_last_name", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_lower_first_name", table_name="contacts")
+    op.drop_index("ix_users_lower_email", table_name="users")
+    op.drop_index("ix_users_lower_username", table_name="users")
@@ -0,0 +1,78 @@
+"""add contacts search columns
+
+Revision ID: 5b2f9c61d8a3
+Revises: 8e41b7c5d2f0
+Create Date: 2026-10-18 13:42:55.208113
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5b2f9c61d8a3"
+down_revision: Union[str, None] = "8e41b7c5d2f0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    op.add_column(
+        "contacts",
+        sa.Column("search_text", sa.Text(), server_default="", nullable=False),
+    )
+    # Backfill, mirrors db.models.contact.build_search_text
+    op.execute(
+        r"""
+        UPDATE contacts c SET search_text = concat_ws(' ',
+            c.first_name,
+            c.last_name,
+            (SELECT string_agg(e.email, ' ') FROM emails e
+             WHERE e.contact_id = c.id),
+            (SELECT string_agg(p.phone || ' ' || regexp_replace(p.phone, '\D', '', 'g'), ' ')
+             FROM phones p WHERE p.contact_id = c.id),
+            (SELECT string_agg(a.value, ' ') FROM additional_data a
+             WHERE a.contact_id = c.id)
+        )
+        """
+    )
+    op.add_column(
+        "contacts",
+        sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('simple', search_text)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_contacts_user_id_search_vector",
+        "contacts",
+        ["user_id", "search_vector"],
+        unique=False,
+        postgresql_using="gin",
+    )
+    op.create_index(
+        "ix_contacts_user_id_search_text_trgm",
+        "contacts",
+        ["user_id", "search_text"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"search_text": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_search_text_trgm", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_search_vector", table_name="contacts")
+    op.drop_column("contacts", "search_vector")
+    op.drop_column("contacts", "search_text")
@@ -0,0 +1,45 @@
+"""add contacts keyset indexes
+
+Revision ID: 696616b135db
+Revises: 4a3acf42b916
+Create Date: 2026-10-18 10:12:31.402871
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "696616b135db"
+down_revision: Union[str, None] = "4a3acf42b916"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_contacts_user_id_last_name",
+        "contacts",
+        ["user_id", "last_name", "first_name", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_contacts_user_id_first_name",
+        "contacts",
+        ["user_id", "first_name", "last_name", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_contacts_user_id_id", "contacts", ["user_id", "id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_id", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_first_name", table_name="contacts")
+    op.drop_index("ix_contacts_user_id_last_name", table_name="contacts")
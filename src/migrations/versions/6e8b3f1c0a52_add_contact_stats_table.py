@@ -0,0 +1,56 @@
+"""add contact_stats table
+
+Revision ID: 6e8b3f1c0a52
+Revises: 2c7d5e9a1b64
+Create Date: 2026-10-18 21:10:42.381950
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "6e8b3f1c0a52"
+down_revision: Union[str, None] = "2c7d5e9a1b64"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "contact_stats",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("birth_month", sa.SmallInteger(), nullable=False),
+        sa.Column("contacts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("without_email", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("without_phone", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "birth_month"),
+    )
+    # Counters of the contacts that already exist
+    op.execute(
+        """
+        INSERT INTO contact_stats
+            (user_id, birth_month, contacts, without_email, without_phone)
+        SELECT
+            c.user_id,
+            COALESCE(EXTRACT(MONTH FROM c.birthday), 0),
+            COUNT(*),
+            COUNT(*) FILTER (
+                WHERE NOT EXISTS (SELECT 1 FROM emails e WHERE e.contact_id = c.id)
+            ),
+            COUNT(*) FILTER (
+                WHERE NOT EXISTS (SELECT 1 FROM phones p WHERE p.contact_id = c.id)
+            )
+        FROM contacts c
+        GROUP BY 1, 2
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("contact_stats")
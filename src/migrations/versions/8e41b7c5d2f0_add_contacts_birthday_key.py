@@ -0,0 +1,49 @@
+"""add contacts birthday_key
+
+Revision ID: 8e41b7c5d2f0
+Revises: 3c9e0d2a7f41
+Create Date: 2026-10-18 12:20:09.664512
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e41b7c5d2f0"
+down_revision: Union[str, None] = "3c9e0d2a7f41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Stored generated column, existing rows are filled in by Postgres
+    op.add_column(
+        "contacts",
+        sa.Column(
+            "birthday_key",
+            sa.SmallInteger(),
+            sa.Computed(
+                "CAST(EXTRACT(MONTH FROM birthday) * 100"
+                " + EXTRACT(DAY FROM birthday) AS SMALLINT)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        "ix_contacts_user_id_birthday_key",
+        "contacts",
+        ["user_id", "birthday_key"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_contacts_user_id_birthday_key", table_name="contacts")
+    op.drop_column("contacts", "birthday_key")
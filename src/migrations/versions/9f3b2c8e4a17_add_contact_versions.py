@@ -0,0 +1,37 @@
+"""add contact versions
+
+Revision ID: 9f3b2c8e4a17
+Revises: d7a4e1f93c20
+Create Date: 2026-10-18 16:31:52.417730
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "9f3b2c8e4a17"
+down_revision: Union[str, None] = "d7a4e1f93c20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Server defaults fill in existing rows
+    op.add_column(
+        "contacts",
+        sa.Column("version", sa.Integer(), server_default="1", nullable=False),
+    )
+    op.add_column(
+        "users",
+        sa.Column("contacts_version", sa.Integer(), server_default="0", nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "contacts_version")
+    op.drop_column("contacts", "version")
@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy.orm import sessionmaker
+from db.database import engine
+from db.models import User
+
+
+@pytest.fixture
+def connection():
+    # Every test runs in one transaction that is rolled back at the end, the
+    # commits of the code under test only release savepoints
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            yield connection
+        finally:
+            transaction.rollback()
+
+
+@pytest.fixture
+def session_factory(connection):
+    return sessionmaker(
+        bind=connection, autoflush=False, join_transaction_mode="create_savepoint"
+    )
+
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+
+@pytest.fixture
+def user(db) -> User:
+    user = User(
+        username="pytest-user",
+        email="pytest-user@example.com",
+        password="not-a-hash",
+        confirmed=True,
+    )
+    db.add(user)
+    db.commit()
+    return user
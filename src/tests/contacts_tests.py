@@ -0,0 +1,147 @@
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import List
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from app.repositories.contacts.crud import ContactsRepository
+from app.routers.contacts.schemas import (
+    BatchRequest,
+    BatchUpdate,
+    ContactCreate,
+    ContactUpdate,
+)
+from app.services.contacts.contact_service import ContactService
+from tests.postgres import requires_postgres
+
+pytestmark = requires_postgres
+
+CONTACTS = 12
+
+
+@contextmanager
+def count_statements(connection):
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(connection, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(connection, "before_cursor_execute", before_cursor_execute)
+
+
+@pytest.fixture
+def contacts(db, user):
+    # Birthdays on the following days, every contact with all its collections
+    repository = ContactsRepository()
+    for i in range(CONTACTS):
+        birthday = (date.today() + timedelta(days=i)).replace(year=1992)
+        contact = {
+            "first_name": "Ann",
+            "last_name": f"Lee{i:02d}",
+            "birthday": birthday,
+            "emails": [
+                {"email": f"ann{i}@example.com"},
+                {"email": f"lee{i}@example.com"},
+            ],
+            "phones": [{"phone": f"+38050{i:07d}"}],
+            "additional_data": [{"key": "company", "value": f"Company {i}"}],
+        }
+        repository.create_contact(db, ContactCreate(**contact), user.id)
+
+
+def list_page(service, db, user_id: int, size: int) -> dict:
+    return service.get_contacts(db, user_id, limit=size)
+
+
+def search_page(service, db, user_id: int, size: int) -> dict:
+    return service.search_contacts(db, user_id, name="ann", limit=size)
+
+
+def full_text_page(service, db, user_id: int, size: int) -> dict:
+    return service.search_contacts(db, user_id, q="ann", limit=size)
+
+
+def birthdays_page(service, db, user_id: int, days: int) -> dict:
+    items = service.get_contacts_with_upcoming_birthdays(db, user_id, days=days)
+    return {"items": items}
+
+
+# Two page sizes per endpoint; for birthdays the window in days sets the size
+@pytest.mark.parametrize(
+    "read, sizes",
+    [
+        (list_page, (2, 10)),
+        (search_page, (2, 10)),
+        (full_text_page, (2, 10)),
+        (birthdays_page, (1, 9)),
+    ],
+    ids=["list", "search", "full-text search", "birthdays"],
+)
+def test_contact_page_runs_a_fixed_number_of_queries(
+    connection, db, user, contacts, read, sizes
+):
+    service = ContactService(ContactsRepository())
+    user_id = user.id
+    counts, lengths = [], []
+    for size in sizes:
+        with count_statements(connection) as statements:
+            page = read(service, db, user_id, size)
+        counts.append(len(statements))
+        lengths.append(len(page["items"]))
+        assert all(len(item["emails"]) == 2 for item in page["items"])
+
+    assert lengths[0] < lengths[1]
+    # The contacts and one query per collection, whatever the page size
+    assert counts == [4, 4]
+
+
+def batch(*operations) -> list:
+    return BatchRequest(operations=list(operations)).operations
+
+
+def test_batch_reports_taken_emails_as_conflicts(db, user, contacts):
+    repository = ContactsRepository()
+    taken = {"first_name": "Ann", "last_name": "Dup", "birthday": None}
+    results = repository.run_batch(
+        db,
+        batch(
+            {
+                "op": "create",
+                "contact": {**taken, "emails": [{"email": "ann0@example.com"}]},
+            },
+            {
+                "op": "create",
+                "contact": {**taken, "emails": [{"email": "new@example.com"}]},
+            },
+        ),
+        user.id,
+    )
+    assert [(r["status"], r.get("error")) for r in results] == [
+        (409, "Email or phone already exists"),
+        (201, None),
+    ]
+
+
+def test_batch_rejects_null_names():
+    with pytest.raises(ValidationError):
+        batch({"op": "update", "id": 1, "contact": {"first_name": None}})
+    # Left out is still fine
+    assert batch({"op": "update", "id": 1, "contact": {"birthday": None}})
+
+
+def test_batch_does_not_report_other_violations_as_conflicts(db, user, contacts):
+    page = ContactService(ContactsRepository()).get_contacts(db, user.id)
+    # Built past the schema validation: a NOT NULL violation is an error,
+    # not a 409 conflict
+    update = BatchUpdate(
+        op="update",
+        id=page["items"][0]["id"],
+        contact=ContactUpdate.model_construct(first_name=None),
+    )
+    with pytest.raises(IntegrityError):
+        ContactsRepository().run_batch(db, [update], user.id)
@@ -0,0 +1,108 @@
+import asyncio
+from datetime import datetime
+import pytest
+from sqlalchemy import select
+from app.helpers.email_sender import email
+from app.helpers.email_sender.local_smtp import LocalSMTPServer
+from app.repositories.email_outbox.outbox import EmailOutboxRepository
+from app.services.email.outbox_worker import EmailOutboxWorker
+from app.settings import settings
+from db.models.email_outbox import EmailOutbox
+from tests.postgres import requires_postgres
+
+pytestmark = requires_postgres
+
+
+@pytest.fixture
+def smtp_settings(monkeypatch):
+    # The transport reads the MAIL_* settings on connect, the port is set
+    # once the local server is listening
+    for name, value in {
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_SSL_TLS": False,
+        "MAIL_STARTTLS": False,
+        "USE_CREDENTIALS": True,
+        "MAIL_USERNAME": "worker@example.com",
+        "MAIL_PASSWORD": "secret",
+        "MAIL_FROM": "noreply@example.com",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+
+
+def enqueue(db, recipient: str, template: str = "verify_email") -> EmailOutbox:
+    message = EmailOutboxRepository().enqueue(
+        db,
+        recipient=recipient,
+        subject="Confirm your email",
+        template=template,
+        context={"host": "http://testserver/", "username": recipient},
+    )
+    # Due before anything else in the table, so the batch claims these first
+    message.next_attempt_at = datetime(2000, 1, 1)
+    db.commit()
+    return message
+
+
+def drain(session_factory, monkeypatch) -> LocalSMTPServer:
+    async def run() -> LocalSMTPServer:
+        async with LocalSMTPServer() as server:
+            monkeypatch.setattr(settings, "MAIL_PORT", server.port)
+            worker = EmailOutboxWorker(session_factory=session_factory)
+            try:
+                await worker.drain_once()
+            finally:
+                await worker.stop()
+        return server
+
+    return asyncio.run(run())
+
+
+def statuses(db, messages):
+    db.expire_all()
+    ids = [message.id for message in messages]
+    rows = db.execute(
+        select(EmailOutbox.id, EmailOutbox.status).where(EmailOutbox.id.in_(ids))
+    )
+    return dict(rows.all())
+
+
+def test_outbox_batch_is_sent_over_one_connection(
+    db, session_factory, smtp_settings, monkeypatch
+):
+    messages = [enqueue(db, f"user{i}@example.com") for i in range(3)]
+
+    server = drain(session_factory, monkeypatch)
+
+    assert server.connections == 1
+    assert sorted(m["To"] for m in server.messages) == [
+        f"user{i}@example.com" for i in range(3)
+    ]
+    body = server.messages[0].get_payload(decode=True).decode()
+    assert "http://testserver/" in body
+    assert set(statuses(db, messages).values()) == {"sent"}
+
+
+def test_failing_message_does_not_abort_the_batch(
+    db, session_factory, smtp_settings, monkeypatch
+):
+    def broken(recipient: str, context: dict) -> str:
+        raise ValueError("cannot render")
+
+    monkeypatch.setitem(email.renderers, "broken", broken)
+    ok_before = enqueue(db, "before@example.com")
+    failing = enqueue(db, "broken@example.com", template="broken")
+    ok_after = enqueue(db, "after@example.com")
+
+    server = drain(session_factory, monkeypatch)
+
+    assert sorted(m["To"] for m in server.messages) == [
+        "after@example.com",
+        "before@example.com",
+    ]
+    assert statuses(db, [ok_before, failing, ok_after]) == {
+        ok_before.id: "sent",
+        failing.id: "pending",
+        ok_after.id: "sent",
+    }
+    db.refresh(failing)
+    assert failing.last_error == "ValueError: cannot render"
@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.auth.jwt_manager import jwt_manager
+from app.settings import settings
+from db.database import get_db
+from db.models.contact import Contact
+from tests.postgres import requires_postgres
+
+pytestmark = requires_postgres
+
+CSV = (
+    b"first_name,last_name,birthday,emails,phones\n"
+    b"Ann,Lee,1992-05-01,ann@example.com,+380500000001\n"
+    b"Bob,Kim,1990-01-02,bob@example.com,+380500000002\n"
+)
+
+
+@pytest.fixture
+def client(db, user):
+    app.dependency_overrides[get_db] = lambda: db
+    app.dependency_overrides[jwt_manager.get_current_user] = lambda: user
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
+
+
+def imported(db, user) -> int:
+    return db.query(Contact).filter(Contact.user_id == user.id).count()
+
+
+def test_csv_upload_is_imported(client, db, user):
+    response = client.post(
+        "/api/contacts/import", files={"file": ("book.csv", CSV, "text/csv")}
+    )
+    assert response.status_code == 200
+    assert response.json() == {"imported": 2, "failed": 0, "errors": []}
+    assert imported(db, user) == 2
+
+
+def test_unknown_file_type_needs_a_format(client):
+    response = client.post(
+        "/api/contacts/import",
+        files={"file": ("book.txt", CSV, "application/octet-stream")},
+    )
+    assert response.status_code == 400
+
+
+def test_upload_over_the_limit_is_refused(client, db, user, monkeypatch):
+    monkeypatch.setattr(settings, "CONTACTS_IMPORT_MAX_BYTES", len(CSV) - 1)
+    response = client.post(
+        "/api/contacts/import",
+        params={"format": "csv"},
+        files={"file": ("book.csv", CSV, "text/csv")},
+    )
+    assert response.status_code == 413
+    assert imported(db, user) == 0
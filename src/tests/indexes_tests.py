@@ -0,0 +1,79 @@
+import pytest
+from sqlalchemy import Select, insert, select, text
+from app.repositories.contacts.queries import _filter_name_lastname_email
+from app.repositories.users.queries import select_user_by_email, select_user_by_username
+from db.models.contact import Contact, Email
+from tests.postgres import requires_postgres
+
+pytestmark = requires_postgres
+
+BOOK_SIZE = 500
+
+
+def used_indexes(connection, stmt: Select) -> set:
+    # EXPLAIN the statement as the app runs it. Sequential scans are turned
+    # off: on a small test database they always win, and the point is
+    # whether an index can serve the query at all
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    compiled = stmt.compile(dialect=connection.dialect)
+    plan = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+
+    def walk(node: dict):
+        if "Index Name" in node:
+            yield node["Index Name"]
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    return set(walk(plan[0]["Plan"]))
+
+
+@pytest.mark.parametrize(
+    "stmt, index",
+    [
+        (select_user_by_username("Alice"), "ix_users_lower_username"),
+        (select_user_by_email("Alice@Example.com"), "ix_users_lower_email"),
+    ],
+    ids=["username", "email"],
+)
+def test_user_lookups_use_lower_indexes(connection, stmt, index):
+    assert index in used_indexes(connection, stmt)
+
+
+@pytest.fixture
+def book(connection, user) -> int:
+    # A book of distinct names, analyzed inside the test transaction: the plan
+    # does not hang on whatever statistics the database had before, and the
+    # user id alone is not selective enough to stand in for the name indexes
+    contact_ids = connection.scalars(
+        insert(Contact).returning(Contact.id),
+        [
+            {"first_name": f"First{i}", "last_name": f"Last{i}", "user_id": user.id}
+            for i in range(BOOK_SIZE)
+        ],
+    ).all()
+    connection.execute(
+        insert(Email),
+        [
+            {"email": f"contact{i}@example.com", "contact_id": contact_id}
+            for i, contact_id in enumerate(contact_ids)
+        ],
+    )
+    connection.execute(text("ANALYZE contacts, emails"))
+    return user.id
+
+
+@pytest.mark.parametrize(
+    "filters, index",
+    [
+        ({"name": "first7"}, "ix_contacts_user_id_lower_first_name"),
+        ({"lastname": "LAST7"}, "ix_contacts_user_id_lower_last_name"),
+        ({"email": "Contact7@Example.com"}, "ix_emails_lower_email"),
+    ],
+    ids=["name", "lastname", "email"],
+)
+def test_contact_filters_use_lower_indexes(connection, book, filters, index):
+    stmt = select(Contact.id).where(Contact.user_id == book)
+    stmt = _filter_name_lastname_email(stmt, **filters)
+    assert index in used_indexes(connection, stmt)
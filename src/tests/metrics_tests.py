@@ -0,0 +1,31 @@
+from prometheus_client import CollectorRegistry
+from app.helpers.cache.user_cache import UserCache
+from app.helpers.metrics.metrics import UserCacheCollector
+from db.models.user import User
+
+
+def test_user_cache_counters_are_exported():
+    cache = UserCache(maxsize=2, ttl=60)
+    for name in ["ann", "bob", "eve"]:
+        cache.set(name, User(username=name))
+    cache.get("eve")
+    cache.get("ann")  # evicted
+    registry = CollectorRegistry()
+    registry.register(UserCacheCollector(cache))
+
+    assert {
+        name: registry.get_sample_value(name)
+        for name in [
+            "user_cache_hits_total",
+            "user_cache_misses_total",
+            "user_cache_evictions_total",
+            "user_cache_size",
+            "user_cache_max_size",
+        ]
+    } == {
+        "user_cache_hits_total": 1,
+        "user_cache_misses_total": 1,
+        "user_cache_evictions_total": 1,
+        "user_cache_size": 2,
+        "user_cache_max_size": 2,
+    }
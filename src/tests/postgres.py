@@ -0,0 +1,22 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from db.database import engine
+
+
+def postgres_available() -> bool:
+    # The database tests run against DATABASE_URL (src/.env, as for the app),
+    # migrated to head
+    if engine.dialect.name != "postgresql":
+        return False
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1 FROM contact_stats LIMIT 1"))
+    except DBAPIError:
+        return False
+    return True
+
+
+requires_postgres = pytest.mark.skipif(
+    not postgres_available(), reason="needs a migrated Postgres at DATABASE_URL"
+)
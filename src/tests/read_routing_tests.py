@@ -0,0 +1,44 @@
+import asyncio
+from app.helpers.api import read_routing
+from app.helpers.api.read_routing import ReadYourWritesMiddleware, RecentWrites
+
+
+def call(middleware, method: str, client: str) -> list:
+    # Whether the caller counted as a recent writer as each message left
+    scope = {
+        "type": "http",
+        "method": method,
+        "path": "/api/contacts/",
+        "headers": [],
+        "client": (client, 50000),
+    }
+    seen = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        key = f"ip:{client}"
+        seen.append((message["type"], read_routing.recent_writes.is_recent(key)))
+
+    asyncio.run(middleware(scope, receive, send))
+    return seen
+
+
+async def answer(scope, receive, send):
+    await send({"type": "http.response.start", "status": 201, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def test_writer_is_marked_before_the_response_starts(monkeypatch):
+    monkeypatch.setattr(read_routing, "recent_writes", RecentWrites(5))
+    middleware = ReadYourWritesMiddleware(answer)
+
+    assert call(middleware, "POST", "10.0.0.1") == [
+        ("http.response.start", True),
+        ("http.response.body", True),
+    ]
+    assert call(middleware, "GET", "10.0.0.2") == [
+        ("http.response.start", False),
+        ("http.response.body", False),
+    ]
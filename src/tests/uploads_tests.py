@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+
+from app.helpers.api.uploads import read_upload
+
+BOUNDARY = "x-boundary"
+
+
+def request(body: bytes) -> Request:
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/api/users/avatar",
+        "headers": [
+            (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    }
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    async def receive():
+        chunk = chunks.pop(0) if chunks else b""
+        return {"type": "http.request", "body": chunk, "more_body": bool(chunks)}
+
+    return Request(scope, receive)
+
+
+def multipart(data: bytes) -> bytes:
+    return (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.png"\r\n'
+        "Content-Type: image/png\r\n\r\n"
+    ).encode() + data + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def read(body: bytes, max_bytes: int = 1024):
+    return asyncio.run(read_upload(request(body), "file", max_bytes))
+
+
+def test_file_field_is_read():
+    upload = read(multipart(b"image bytes"))
+    assert upload.data == b"image bytes"
+    assert upload.content_type == "image/png"
+    assert upload.filename == "a.png"
+
+
+def test_upload_over_the_limit_is_refused():
+    with pytest.raises(HTTPException) as err:
+        read(multipart(b"x" * 100), max_bytes=10)
+    assert err.value.status_code == 413
+
+
+@pytest.mark.parametrize(
+    "body",
+    [
+        # Not starting with the boundary
+        b"--other-boundary\r\n" + multipart(b"image bytes"),
+        # Part headers cut off before their end
+        f"--{BOUNDARY}\r\nContent-Disposition form-data".encode(),
+    ],
+)
+def test_malformed_upload_is_a_bad_request(body):
+    with pytest.raises(HTTPException) as err:
+        read(body)
+    assert err.value.status_code == 400
+    assert err.value.detail == "Malformed multipart upload"